@@ -0,0 +1,299 @@
+"""
+Scaling benchmarks for the pipeline stages on synthetic corpora.
+
+For each corpus size the suite generates posts with `synthetic_corpus`, then records
+wall time, throughput and peak memory for preprocessing, classification,
+sentiment, topic modeling, network building and geospatial aggregation. Results are
+written as JSON and compared with the baselines recorded in `benchmark_thresholds.json`:
+a benchmark regresses when its time or peak memory exceeds the baseline measured at the
+same corpus size by more than the file's stated margin.
+
+Each benchmark runs in a forked child process so that it starts from the same state
+and its peak memory can be read from the child's maximum resident set size. Peak
+memory is reported as the growth over the child's resident size at start.
+
+Usage:
+    python benchmark_suite.py --sizes 10000 100000 [--stages topics network] [--check]
+    python benchmark_suite.py --sizes 10000 --stages topics --update-baseline
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+
+import pandas as pd
+from profiling import max_rss_bytes
+from synthetic_corpus import generate_corpus, load_profile, to_preprocessed
+
+SHAPEFILE_PATH = "shapefile/CTYUA_MAY_2023_UK_BGC.shp"
+THRESHOLDS_FILE = "benchmark_thresholds.json"
+RESULTS_FILE = "benchmark_results.json"
+
+
+class BenchmarkSkipped(Exception):
+    """Raised when a benchmark cannot run in this environment (e.g. missing shapefile)."""
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmark fails inside its child process."""
+
+
+# ------------------------
+# Benchmarks
+# ------------------------
+# Each benchmark receives the raw corpus, the preprocessed corpus, the parsed
+# command-line arguments and a scratch directory (removed after the measurement),
+# and returns a zero-argument callable to be measured.
+
+def _build_text_store(df, workdir):
+    """
+    Builds the text store of the corpus in the scratch directory, as preprocessing does
+    for the app, so classification and topic modeling read its shared document-term
+    matrix. Building it is not part of the measurement.
+    """
+    from text_store import append_documents, load_text_store
+
+    root = os.path.join(workdir, "text_store")
+    # Token IDs are not read by the analyses, so whitespace tokens stand in for lemmas
+    append_documents(root, df["Cleaned_Text"], df["Cleaned_Text"].str.split())
+    return load_text_store(root)
+
+
+def bench_preprocess(raw, df, args, workdir):
+    from data_preprocessor import preprocess_flood_data
+
+    input_file = os.path.join(workdir, "raw.csv")
+    raw.to_csv(input_file, index=False)
+    return lambda: preprocess_flood_data(input_file, os.path.join(workdir, "preprocessed.csv"))
+
+
+def bench_classify(raw, df, args, workdir):
+    from model import train_random_forest
+
+    text_store = _build_text_store(df, workdir)
+    return lambda: train_random_forest(df.copy(), text_store)
+
+
+def bench_sentiment(raw, df, args, workdir):
+    from sentiment import analyze_sentiment
+    return lambda: analyze_sentiment(df.copy())
+
+
+def bench_topics(raw, df, args, workdir):
+    from topic_modeling import fit_lda_topics, count_topic_trends
+
+    text_store = _build_text_store(df, workdir)
+
+    def run():
+        _, assigned, _ = fit_lda_topics(df.copy(), text_store=text_store)
+        count_topic_trends(assigned)
+    return run
+
+
+def bench_network(raw, df, args, workdir):
+    from network_analysis import extract_top_hashtags_mentions, build_network_edges
+
+    def run():
+        extract_top_hashtags_mentions(df)
+        build_network_edges(df.copy())
+    return run
+
+
+def bench_geospatial(raw, df, args, workdir):
+    if not os.path.exists(args.shapefile):
+        raise BenchmarkSkipped(f"shapefile {args.shapefile} not found")
+
+    from geo_spatial import load_boundary_layer, count_posts_by_location, JOIN_TOLERANCE
+    gdf_map = load_boundary_layer(args.shapefile, JOIN_TOLERANCE)
+    return lambda: count_posts_by_location(df, gdf_map)
+
+
+BENCHMARKS = {
+    "preprocess": bench_preprocess,
+    "classify": bench_classify,
+    "sentiment": bench_sentiment,
+    "topics": bench_topics,
+    "network": bench_network,
+    "geospatial": bench_geospatial,
+}
+
+
+# ------------------------
+# Runner
+# ------------------------
+
+def _measure_child(fn, conn):
+    try:
+        gc.collect()
+        rss_start = max_rss_bytes()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        conn.send(("ok", elapsed, max_rss_bytes() - rss_start))
+    except BaseException as e:
+        # Keep the first meaningful line (NLTK errors start with a row of asterisks)
+        message = next((line.strip() for line in str(e).splitlines() if any(c.isalnum() for c in line)), "")
+        conn.send(("error", type(e).__name__, message))
+    finally:
+        conn.close()
+
+
+def measure(fn):
+    """
+    Runs `fn` once in a forked child process and returns its wall time in seconds and
+    peak resident memory growth in bytes.
+    """
+    context = multiprocessing.get_context("fork")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_child, args=(fn, child_conn))
+    process.start()
+    child_conn.close()
+    try:
+        outcome = parent_conn.recv()
+    except EOFError:
+        outcome = ("error", "ChildProcessError", f"benchmark process exited with code {process.exitcode}")
+    process.join()
+
+    if outcome[0] == "error":
+        raise BenchmarkError(f"{outcome[1]}: {outcome[2]}")
+    return outcome[1], outcome[2]
+
+
+def check_thresholds(result, thresholds):
+    """
+    Compares a result with the baseline recorded for its benchmark and corpus size.
+
+    The limits are the baseline's time and peak memory per row plus the margins stated
+    in the thresholds file.
+
+    :return: List of exceeded limits (empty if within limits or there is no baseline).
+    """
+    baseline = thresholds.get("baselines", {}).get(result["benchmark"], {}).get(str(result["rows"]))
+    if not baseline or result["status"] != "ok":
+        return []
+
+    margins = thresholds.get("margins", {})
+    exceeded = []
+    us_per_row = result["seconds"] / result["rows"] * 1e6
+    bytes_per_row = result["peak_bytes"] / result["rows"]
+    max_us_per_row = baseline["us_per_row"] * (1 + margins.get("time", 0))
+    max_bytes_per_row = baseline["peak_bytes_per_row"] * (1 + margins.get("memory", 0))
+    if us_per_row > max_us_per_row:
+        exceeded.append(f"time {us_per_row:.1f}us/row > {max_us_per_row:.1f}us/row "
+                        f"(baseline {baseline['us_per_row']:.1f})")
+    if bytes_per_row > max_bytes_per_row:
+        exceeded.append(f"memory {bytes_per_row:.0f}B/row > {max_bytes_per_row:.0f}B/row "
+                        f"(baseline {baseline['peak_bytes_per_row']:.0f})")
+    return exceeded
+
+
+def update_baselines(thresholds, results):
+    """
+    Records the successful results as the new baselines for their benchmark and size.
+    """
+    baselines = thresholds.setdefault("baselines", {})
+    measured_on = f"{platform.platform()}, Python {platform.python_version()}"
+    for result in results:
+        if result["status"] == "ok":
+            baselines.setdefault(result["benchmark"], {})[str(result["rows"])] = {
+                "us_per_row": round(result["seconds"] / result["rows"] * 1e6, 2),
+                "peak_bytes_per_row": round(result["peak_bytes"] / result["rows"], 1),
+                "measured_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+                "measured_on": measured_on,
+            }
+    return thresholds
+
+
+def run_benchmarks(sizes, stages, args, thresholds=None):
+    """
+    Runs the selected benchmarks for every corpus size.
+
+    :return: List of result dicts (one per benchmark and size).
+    """
+    thresholds = thresholds or {}
+    profile = load_profile()
+    results = []
+
+    for size in sizes:
+        print(f"⏳ Generating {size:,} synthetic posts...")
+        raw = generate_corpus(size, seed=args.seed, profile=profile)
+        df = to_preprocessed(raw)
+
+        for name in stages:
+            result = {"benchmark": name, "rows": size, "status": "ok"}
+            try:
+                with tempfile.TemporaryDirectory() as workdir:
+                    result["seconds"], result["peak_bytes"] = measure(BENCHMARKS[name](raw, df, args, workdir))
+                result["rows_per_sec"] = size / result["seconds"]
+            except BenchmarkSkipped as e:
+                result.update(status="skipped", reason=str(e))
+            except ImportError as e:
+                result.update(status="skipped", reason=f"missing dependency: {e.name}")
+            except BenchmarkError as e:
+                result.update(status="error", reason=str(e))
+            except Exception as e:
+                result.update(status="error", reason=f"{type(e).__name__}: {e}")
+
+            result["regressions"] = check_thresholds(result, thresholds)
+            results.append(result)
+
+            if result["status"] == "ok":
+                flag = "❌" if result["regressions"] else "✅"
+                print(f"{flag} {name} @ {size:,}: {result['seconds']:.2f}s, "
+                      f"{result['rows_per_sec']:,.0f} rows/s, peak {result['peak_bytes'] / 2**20:.1f} MiB")
+                for regression in result["regressions"]:
+                    print(f"   ⚠️ {regression}")
+            else:
+                print(f"⚠️ {name} @ {size:,}: {result['status']} ({result['reason']})")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic corpora.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000],
+                        help="Corpus sizes in rows (10k to 10M).")
+    parser.add_argument("--stages", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help="Benchmarks to run.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic corpus.")
+    parser.add_argument("--shapefile", default=SHAPEFILE_PATH, help="CTYUA boundary shapefile.")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE, help="JSON file of baselines and margins.")
+    parser.add_argument("--output", default=RESULTS_FILE, help="Where to write the JSON results.")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if any limit is exceeded or any benchmark fails.")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record the successful results as the baselines in the thresholds file.")
+    args = parser.parse_args()
+
+    thresholds = {}
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+
+    results = run_benchmarks(args.sizes, args.stages, args, thresholds)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "generated_at": pd.Timestamp.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=1)
+    print(f"📋 Results saved to {args.output}")
+
+    if args.update_baseline:
+        with open(args.thresholds, "w") as f:
+            json.dump(update_baselines(thresholds, results), f, indent=1)
+            f.write("\n")
+        print(f"📋 Baselines updated in {args.thresholds}")
+
+    if args.check and any(result["regressions"] or result["status"] == "error" for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from data_preprocessor import parse_timestamps
+from partitioned_store import partition_dir_for, partitions_up_to_date, query_date_range
+from profiling import profile_stage
+
+# Copy-on-Write lets every analysis receive a view of the shared cached frame: columns
+# are only copied if an analysis modifies them, and the cached frame is never changed.
+# It is always on from pandas 3.0.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def file_version(path):
+    """
+    Returns a cheap fingerprint of a file (modification time and size) used to detect
+    when the cached data is stale.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_resource(max_entries=4, show_spinner="Loading preprocessed data...")
+def _load_frame(path, version):
+    """
+    Reads and normalises the preprocessed dataset once per file version.
+
+    Timestamps are parsed once and the frame is sorted by time with unparseable
+    timestamps last, 'Location' becomes categorical and 'Label' is downcast. The
+    'Tokens' column of files written before the text store is not loaded.
+    `st.cache_resource` keeps a single frame shared by every page and rerun.
+    """
+    with profile_stage("load.read_csv") as stage:
+        # Token lists are kept as term IDs in the text store (see text_store.py)
+        df = pd.read_csv(path, dtype={"Location": "category"}, usecols=lambda column: column != "Tokens")
+        stage["rows"] = len(df)
+
+    with profile_stage("load.normalise", rows=len(df)):
+        df["Timestamp"] = parse_timestamps(df["Timestamp"])
+        if "Label" in df.columns:
+            df["Label"] = pd.to_numeric(df["Label"], downcast="integer")
+        if "Doc_Id" in df.columns:
+            df["Doc_Id"] = pd.to_numeric(df["Doc_Id"], downcast="integer")
+
+        df = df.sort_values("Timestamp", na_position="last", kind="stable").reset_index(drop=True)
+    return df, int(df["Timestamp"].notna().sum())
+
+
+def load_preprocessed_data(path, dropna_timestamps=False):
+    """
+    Returns the preprocessed dataset from the shared cache.
+
+    The file is re-read only when its modification time or size changes. The returned
+    DataFrame is a zero-copy view: analyses may add or overwrite columns without
+    affecting the cached frame or each other.
+
+    :param path: Path to the preprocessed CSV file.
+    :param dropna_timestamps: Exclude rows whose timestamp could not be parsed.
+    :return: DataFrame sorted by 'Timestamp'.
+    """
+    df, n_valid = _load_frame(path, file_version(path))
+    if dropna_timestamps:
+        return df.iloc[:n_valid]
+    return df.iloc[:]
+
+
+def filter_date_range(df, start, end, timestamp_column="Timestamp"):
+    """
+    Returns the rows of a frame sorted by `timestamp_column` between `start` and `end`
+    (inclusive), located by binary search rather than a boolean mask.
+
+    :return: Zero-copy view of the rows in range.
+    """
+    timestamps = df[timestamp_column].to_numpy()
+    lo = np.searchsorted(timestamps, pd.Timestamp(start).to_datetime64(), side="left")
+    hi = np.searchsorted(timestamps, pd.Timestamp(end).to_datetime64(), side="right")
+    return df.iloc[lo:hi]
+
+
+def load_date_range(path, start=None, end=None):
+    """
+    Returns the preprocessed posts between `start` and `end` (inclusive) without loading
+    the whole history.
+
+    Only the months in range are read from the month-partitioned store that mirrors the
+    CSV (see partitioned_store.py). If the store is missing or older than the CSV, the
+    rows are taken from the shared cached frame instead.
+
+    :param path: Path to the preprocessed CSV file.
+    :param start: Start of the range (None for no lower bound).
+    :param end: End of the range (None for no upper bound).
+    :return: DataFrame sorted by 'Timestamp', without unparseable timestamps.
+    """
+    start = pd.Timestamp(start) if start is not None else pd.Timestamp.min
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+
+    root = partition_dir_for(path)
+    if not partitions_up_to_date(root, path):
+        return filter_date_range(load_preprocessed_data(path, dropna_timestamps=True), start, end)
+
+    with profile_stage("load.partitions") as stage:
+        df = query_date_range(root, start, end)
+        stage["rows"] = len(df)
+    for column in ("Label", "Doc_Id"):
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
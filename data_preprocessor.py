@@ -1,11 +1,43 @@
 import os
 import re
+import numpy as np
 import pandas as pd
 import nltk
 from nltk.corpus import stopwords, wordnet
 from nltk.stem import WordNetLemmatizer
+from profiling import profiled, profile_stage, record_rows
+from text_store import append_documents, build_text_store_from_csv, clear_text_store, csv_needs_text_store_rebuild, \
+    text_store_dir_for, text_store_size
 
+# Raw columns of geotagged posts, used by the spatial join in geo_spatial
+COORDINATE_COLUMNS = ["latitude", "longitude"]
 
+
+def parse_timestamps(series):
+    """
+    Convert a Timestamp column to datetime.
+
+    The original dataset stores timestamps as Excel serial day numbers (e.g. 41525.78),
+    while newly scraped posts are appended as datetime strings, so a single column can
+    hold both forms.
+
+    :param series: Series of raw timestamp values.
+    :return: Series of datetime64 values (unparseable entries become NaT).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    numeric = pd.to_numeric(series, errors='coerce')
+    parsed = pd.to_datetime(numeric, unit='D', origin='1899-12-30', errors='coerce').dt.round('s').astype('datetime64[ns]')
+
+    text = numeric.isna() & series.notna()
+    if text.any():
+        parsed[text] = pd.to_datetime(series[text], format='mixed', errors='coerce').astype('datetime64[ns]')
+
+    return parsed
+
+
+@profiled("preprocess")
 def preprocess_flood_data(input_file, output_file):
     """
     Preprocess the flood data from a given CSV file.
@@ -18,13 +50,16 @@ def preprocess_flood_data(input_file, output_file):
         return
 
     print(f"🔄 Loading dataset from {input_file}...")
-    data = pd.read_csv(input_file)
+    with profile_stage("preprocess.read_csv") as stage:
+        data = pd.read_csv(input_file)
+        stage["rows"] = len(data)
 
-    # Handle missing values
-    data.dropna(inplace=True)
+    # Handle missing values (coordinates are optional: most posts are not geotagged)
+    data.dropna(subset=[column for column in data.columns if column not in COORDINATE_COLUMNS], inplace=True)
 
     # Remove duplicates
     data = data.drop_duplicates()
+    record_rows(len(data))
 
     # Extract mentions (@username) from text
     def extract_mentions(text):
@@ -50,14 +85,15 @@ def preprocess_flood_data(input_file, output_file):
         text = re.sub(r'\s+', ' ', text).strip()  # Remove extra spaces
         return text
 
-    data['cleaned_text'] = data['text'].apply(clean_text)
+    with profile_stage("preprocess.clean", rows=len(data)):
+        data['cleaned_text'] = data['text'].apply(clean_text)
 
-    # Tokenization
-    data['tokens'] = data['cleaned_text'].apply(lambda x: x.split())
+        # Tokenization
+        data['tokens'] = data['cleaned_text'].apply(lambda x: x.split())
 
-    # Stopword Removal
-    stop_words = set(stopwords.words('english'))
-    data['tokens'] = data['tokens'].apply(lambda x: [word for word in x if word not in stop_words])
+        # Stopword Removal
+        stop_words = set(stopwords.words('english'))
+        data['tokens'] = data['tokens'].apply(lambda x: [word for word in x if word not in stop_words])
 
     # Lemmatization
     lemmatizer = WordNetLemmatizer()
@@ -67,7 +103,8 @@ def preprocess_flood_data(input_file, output_file):
         tag_dict = {'J': wordnet.ADJ, 'N': wordnet.NOUN, 'V': wordnet.VERB, 'R': wordnet.ADV}
         return tag_dict.get(tag, wordnet.NOUN)
 
-    data['tokens'] = data['tokens'].apply(lambda x: [lemmatizer.lemmatize(word, get_wordnet_pos(word)) for word in x])
+    with profile_stage("preprocess.lemmatize", rows=len(data)):
+        data['tokens'] = data['tokens'].apply(lambda x: [lemmatizer.lemmatize(word, get_wordnet_pos(word)) for word in x])
 
     # Ensure lowercase column names
     data.rename(columns={
@@ -78,7 +115,9 @@ def preprocess_flood_data(input_file, output_file):
         "mention": "Mention",
         "hashtag": "Hashtag",
         "cleaned_text": "Cleaned_Text",
-        "tokens": "Tokens"
+        "tokens": "Tokens",
+        "latitude": "Latitude",
+        "longitude": "Longitude"
     }, inplace=True)
 
 
@@ -86,7 +125,50 @@ def preprocess_flood_data(input_file, output_file):
     # Save preprocessed data
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     write_header = not os.path.exists(output_file)
-    data.to_csv(output_file, mode='a', index=False, header=write_header)
+
+    # The month-partitioned copy used for date-range queries is appended to only if it
+    # already matches the CSV; checked before the CSV (and its mtime) changes below
+    from partitioned_store import append_partitions, build_partitions_from_csv, clear_partitions, \
+        partition_dir_for, partitions_up_to_date
+    partition_dir = partition_dir_for(output_file)
+    partitions_current = not write_header and partitions_up_to_date(partition_dir, output_file)
+
+    # Tokens are kept only in the shared text store (vocabulary, int32 token IDs and
+    # document-term counts); each post's 'Doc_Id' is its row there. The store must
+    # describe the existing rows first, so older files are migrated before appending.
+    tokens = data.pop("Tokens")
+
+    text_dir = text_store_dir_for(output_file)
+    csv_rewritten = False
+    if write_header:
+        clear_text_store(text_dir)
+    elif csv_needs_text_store_rebuild(output_file, text_dir):
+        with profile_stage("preprocess.text_store_rebuild"):
+            csv_rewritten = build_text_store_from_csv(output_file, text_dir)
+    first_doc_id = text_store_size(text_dir)
+    data["Doc_Id"] = np.arange(first_doc_id, first_doc_id + len(data))
+
+    if not write_header:
+        # Append in the file's column order; columns it lacks (e.g. coordinates in a file
+        # started without them) are dropped and columns the batch lacks are left empty
+        data = data.reindex(columns=pd.read_csv(output_file, nrows=0).columns)
+
+    with profile_stage("preprocess.write_csv", rows=len(data)):
+        data.to_csv(output_file, mode='a', index=False, header=write_header)
+
+    with profile_stage("preprocess.text_store", rows=len(data)):
+        append_documents(text_dir, data["Cleaned_Text"], tokens)
+
+    # Keep the partitions in step with the CSV: a new CSV starts them afresh, and ones
+    # that are stale or predate a rewritten CSV are rebuilt from it
+    with profile_stage("preprocess.partitions", rows=len(data)):
+        if write_header:
+            clear_partitions(partition_dir)
+            append_partitions(data, partition_dir)
+        elif partitions_current and not csv_rewritten:
+            append_partitions(data, partition_dir)
+        else:
+            build_partitions_from_csv(output_file, partition_dir)
 
     print(f"✅ Preprocessing completed! Data saved to {output_file}")
 
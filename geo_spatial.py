@@ -1,8 +1,238 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
 import geopandas as gpd
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+import shapely
 import streamlit as st
+from matplotlib.figure import Figure
+from pyproj import Transformer
+from profiling import profiled, profile_stage
 
+# Simplification tolerance for the display layer, in the shapefile's units
+# (metres, as the CTYUA boundaries use the British National Grid).
+DISPLAY_TOLERANCE = 100
+
+# The spatial join uses the full-resolution polygons: simplifying each area on its own
+# opens gaps and overlaps between neighbours, which would misassign points near borders.
+JOIN_TOLERANCE = 0
+
+# Number of rendered maps kept in memory, keyed by a hash of the post counts.
+RENDER_CACHE_SIZE = 32
+
+# Number of points transformed and queried against the spatial index at a time.
+SPATIAL_JOIN_CHUNK_SIZE = 1_000_000
+
+_boundary_layers = {}
+_spatial_indexes = {}
+_base_maps = {}
+_rendered_maps = OrderedDict()
+_render_lock = threading.Lock()
+
+
+def _boundary_cache_path(shapefile_path, tolerance):
+    """
+    Returns the path of the binary (GeoParquet) cache for a shapefile and tolerance.
+    """
+    directory, filename = os.path.split(shapefile_path)
+    name = os.path.splitext(filename)[0]
+    return os.path.join(directory, ".cache", f"{name}_tol{tolerance}.parquet")
+
+
+@profiled("geospatial.boundaries")
+def load_boundary_layer(shapefile_path, tolerance=DISPLAY_TOLERANCE):
+    """
+    Loads the exploded, simplified boundary layer with normalised area names.
+
+    The first call reads the full-resolution shapefile and writes a GeoParquet cache
+    next to it; later calls read the cache, and repeat calls within the same process
+    return the layer already in memory. The cache is rebuilt whenever the shapefile
+    is newer than it.
+
+    :param shapefile_path: Path to the CTYUA shapefile.
+    :param tolerance: Simplification tolerance in map units (0 keeps full resolution).
+    :return: GeoDataFrame with one polygon per row and a lowercase 'CTYUA23NM' column.
+    """
+    shapefile_mtime = os.path.getmtime(shapefile_path)
+    key = (os.path.abspath(shapefile_path), tolerance, shapefile_mtime)
+
+    if key in _boundary_layers:
+        return _boundary_layers[key]
+
+    cache_path = _boundary_cache_path(shapefile_path, tolerance)
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= shapefile_mtime:
+        gdf_map = gpd.read_parquet(cache_path)
+    else:
+        gdf_map = gpd.read_file(shapefile_path).explode(index_parts=False).reset_index(drop=True)
+        gdf_map["CTYUA23NM"] = gdf_map["CTYUA23NM"].str.strip().str.lower()
+        if tolerance:
+            gdf_map["geometry"] = gdf_map.geometry.simplify(tolerance, preserve_topology=True)
+        gdf_map = gdf_map[["CTYUA23NM", "geometry"]]
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        gdf_map.to_parquet(cache_path)
+
+    _boundary_layers[key] = gdf_map
+    return gdf_map
+
+
+def get_spatial_index(gdf_map):
+    """
+    Returns the STRtree over the polygons of a boundary layer, building it on first use.
+    The index lives alongside the in-memory boundary layer it was built from.
+    """
+    key = id(gdf_map)
+    if key not in _spatial_indexes:
+        _spatial_indexes[key] = (gdf_map, shapely.STRtree(gdf_map.geometry.values))
+    return _spatial_indexes[key][1]
+
+
+@profiled("geospatial.join")
+def assign_points_to_areas(latitudes, longitudes, gdf_map):
+    """
+    Assigns WGS84 coordinates to boundary areas with a point-in-polygon spatial join.
+
+    Points are projected into the layer's CRS and queried against the STRtree in
+    vectorised chunks. A point on a shared border is given to the first matching area.
+
+    :param latitudes: Array-like of latitudes in degrees.
+    :param longitudes: Array-like of longitudes in degrees.
+    :param gdf_map: Full-resolution boundary layer, `load_boundary_layer(path, JOIN_TOLERANCE)`.
+    :return: Object array of area names ('CTYUA23NM'), None where no area contains the point.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+
+    tree = get_spatial_index(gdf_map)
+    names = gdf_map["CTYUA23NM"].to_numpy()
+    transformer = Transformer.from_crs("EPSG:4326", gdf_map.crs, always_xy=True)
+
+    areas = np.full(len(latitudes), None, dtype=object)
+    valid = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+
+    for start in range(0, len(valid), SPATIAL_JOIN_CHUNK_SIZE):
+        rows = valid[start:start + SPATIAL_JOIN_CHUNK_SIZE]
+        x, y = transformer.transform(longitudes[rows], latitudes[rows])
+        point_idx, polygon_idx = tree.query(shapely.points(x, y), predicate="intersects")
+
+        # Keep the first matching polygon for each point
+        point_idx, first = np.unique(point_idx, return_index=True)
+        areas[rows[point_idx]] = names[polygon_idx[first]]
+
+    return areas
+
+
+@profiled("geospatial.count")
+def count_posts_by_location(df, gdf_map):
+    """
+    Counts posts per boundary area.
+
+    Posts with 'Latitude' and 'Longitude' are attributed by a spatial join against the
+    boundary polygons; the remaining posts, and geotagged posts outside every polygon,
+    are matched by 'Location' against the area names.
+
+    :param df: Posts with a 'Location' column and optionally 'Latitude'/'Longitude'.
+    :param gdf_map: Full-resolution boundary layer, `load_boundary_layer(path, JOIN_TOLERANCE)`.
+    :return: DataFrame with 'Location' and 'post_count' columns for matched areas only.
+    """
+    locations = df["Location"].astype(str).str.strip().str.lower()
+
+    if "Latitude" in df.columns and "Longitude" in df.columns:
+        geotagged = (df["Latitude"].notna() & df["Longitude"].notna()).to_numpy()
+        if geotagged.any():
+            areas = assign_points_to_areas(df["Latitude"].to_numpy()[geotagged],
+                                           df["Longitude"].to_numpy()[geotagged], gdf_map)
+            matched = pd.notna(areas)
+            locations = locations.to_numpy(dtype=object)
+            locations[np.flatnonzero(geotagged)[matched]] = areas[matched]
+            locations = pd.Series(locations, index=df.index)
+
+    relevant = locations[locations.isin(gdf_map["CTYUA23NM"].unique())]
+    return relevant.groupby(relevant).size().rename_axis("Location").reset_index(name="post_count")
+
+
+def benchmark_spatial_join(shapefile_path, n_points=1_000_000, seed=42):
+    """
+    Measures spatial join throughput on random points within the boundary layer's extent.
+
+    :return: Tuple of (points per second, fraction of points assigned to an area).
+    """
+    gdf_map = load_boundary_layer(shapefile_path, JOIN_TOLERANCE)
+    get_spatial_index(gdf_map)
+
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = gdf_map.total_bounds
+    to_wgs84 = Transformer.from_crs(gdf_map.crs, "EPSG:4326", always_xy=True)
+    longitudes, latitudes = to_wgs84.transform(rng.uniform(minx, maxx, n_points), rng.uniform(miny, maxy, n_points))
+
+    start = time.perf_counter()
+    areas = assign_points_to_areas(latitudes, longitudes, gdf_map)
+    elapsed = time.perf_counter() - start
+
+    return n_points / elapsed, float(pd.notna(areas).mean())
+
+
+def _get_base_map(gdf_map):
+    """
+    Draws the boundary polygons once and returns the figure, the polygon collection
+    and its colorbar so later renders only need to recolor the collection.
+    """
+    key = id(gdf_map)
+    if key not in _base_maps:
+        fig = Figure(figsize=(14, 10))
+        ax = fig.subplots()
+        gdf_map.plot(column=np.zeros(len(gdf_map)), cmap="Blues", edgecolor="black", ax=ax, alpha=0.85)
+        collection = ax.collections[0]
+        colorbar = fig.colorbar(collection, ax=ax)
+        ax.set_title("Geospatial Distribution of Disaster-Related Social Media Posts", fontsize=14)
+        ax.axis("off")
+        _base_maps[key] = (gdf_map, fig, collection, colorbar)
+    return _base_maps[key][1:]
+
+
+def render_post_count_map(gdf_map, post_counts, dpi=150):
+    """
+    Renders the choropleth for the given per-polygon post counts as PNG bytes.
+
+    The base geometry is drawn once per boundary layer; each render only updates the
+    color mapping. Rendered images are cached by a hash of the counts, so revisiting
+    a date range returns the earlier image without redrawing.
+
+    :param gdf_map: Boundary layer returned by `load_boundary_layer`.
+    :param post_counts: Array of post counts aligned with the rows of `gdf_map`.
+    :param dpi: Resolution of the rendered PNG.
+    :return: PNG image as bytes.
+    """
+    values = np.asarray(post_counts, dtype=np.int64)
+    digest = hashlib.sha1(values.tobytes()).hexdigest()
+    cache_key = (id(gdf_map), dpi, digest)
+
+    with _render_lock:
+        if cache_key in _rendered_maps:
+            _rendered_maps.move_to_end(cache_key)
+            return _rendered_maps[cache_key]
+
+        fig, collection, colorbar = _get_base_map(gdf_map)
+        collection.set_array(values)
+        collection.set_clim(values.min(), values.max())
+        colorbar.update_normal(collection)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+        image = buffer.getvalue()
+
+        _rendered_maps[cache_key] = image
+        if len(_rendered_maps) > RENDER_CACHE_SIZE:
+            _rendered_maps.popitem(last=False)
+
+    return image
+
+
+@profiled("geospatial")
 def plot_disaster_post_distribution(df, shapefile_path, save_path="shapefile/disaster_post_distribution.png"):
     """
     Plots a choropleth map showing the distribution of disaster-related social media posts per location.
@@ -13,38 +243,42 @@ def plot_disaster_post_distribution(df, shapefile_path, save_path="shapefile/dis
     if "Location" not in df.columns:
         raise KeyError("❌ Error: 'Location' column is missing in DataFrame.")
 
-    df_geo = df.copy()
+    # Filter location counts to only show relevant locations (joined at full resolution)
+    location_counts = count_posts_by_location(df, load_boundary_layer(shapefile_path, JOIN_TOLERANCE))
+    show_post_count_map(location_counts, shapefile_path, save_path)
 
-    # Ensure 'Location' is a string before processing
-    df_geo["Location"] = df_geo["Location"].astype(str).str.strip().str.lower()
 
-    # Load the UK shapefile
-    gdf_map = gpd.read_file(shapefile_path).explode(index_parts=False)
-    gdf_map["CTYUA23NM"] = gdf_map["CTYUA23NM"].str.strip().str.lower()
+def show_post_count_map(location_counts, shapefile_path, save_path="shapefile/disaster_post_distribution.png"):
+    """
+    Displays post counts per area and their choropleth map in Streamlit.
 
-    # Filter location counts to only show relevant locations
-    relevant_locations = gdf_map["CTYUA23NM"].unique()
-    location_counts = df_geo[df_geo["Location"].isin(relevant_locations)]
-    location_counts = location_counts.groupby("Location").size().reset_index(name="post_count")
+    :param location_counts: DataFrame with 'Location' and 'post_count' columns, from
+                            `count_posts_by_location` or saved by the pipeline.
+    """
+    # Load the cached, simplified UK boundary layer for drawing
+    gdf_map = load_boundary_layer(shapefile_path)
 
     # Display filtered location post counts in Streamlit
     st.subheader("📌 Disaster-related posts count by relevant locations:")
     st.dataframe(location_counts)
 
-    # Merge geospatial boundary data with filtered post counts
-    gdf_map = gdf_map.merge(location_counts, left_on="CTYUA23NM", right_on="Location", how="left")
+    # Map counts onto the boundary polygons, filling missing values with 0
+    post_count = gdf_map["CTYUA23NM"].map(location_counts.set_index("Location")["post_count"])
+    post_count = post_count.fillna(0).astype(int).to_numpy()
 
-    # Fill missing values with 0
-    gdf_map["post_count"] = gdf_map["post_count"].fillna(0).astype(int)
+    # Render the map (recolors the cached base map, or reuses an earlier render)
+    with profile_stage("geospatial.render"):
+        image = render_post_count_map(gdf_map, post_count)
+    if save_path:
+        with open(save_path, "wb") as f:
+            f.write(image)
 
-    # Plot the map
-    fig, ax = plt.subplots(figsize=(14, 10))
-    gdf_map.plot(column="post_count", cmap="Blues", edgecolor="black", legend=True, ax=ax, alpha=0.85)
-    ax.set_title("Geospatial Distribution of Disaster-Related Social Media Posts", fontsize=14)
-    ax.axis("off")
-    plt.savefig(save_path, dpi=300, bbox_inches="tight")
-    plt.close(fig)  # Ensure figure is closed before displaying
-    
     # Display image in Streamlit
     with st.container():  # Prevent automatic detection outside the container
-        st.image(save_path, caption="Geospatial Distribution of Disaster-Related Social Media Posts")
+        st.image(image, caption="Geospatial Distribution of Disaster-Related Social Media Posts")
+
+
+# Run standalone for benchmarking
+if __name__ == "__main__":
+    points_per_sec, matched = benchmark_spatial_join("shapefile/CTYUA_MAY_2023_UK_BGC.shp")
+    print(f"✅ Spatial join: {points_per_sec:,.0f} points/sec ({matched:.1%} of points matched an area).")
@@ -1,17 +1,23 @@
 import streamlit as st
 import pandas as pd
 import os
+import json
 import geopandas as gpd
 import matplotlib.pyplot as plt
 from scraper import scrape_flood_posts
 from data_preprocessor import preprocess_flood_data
+from data_loader import load_preprocessed_data, filter_date_range, file_version
 from model import train_random_forest
-from geo_spatial import plot_disaster_post_distribution
-from sentiment import plot_sentiment_analysis
+from geo_spatial import plot_disaster_post_distribution, show_post_count_map
+from sentiment import plot_sentiment_analysis, show_sentiment_results
 from time_series import run_time_series_analysis
-from network_analysis import extract_top_hashtags_mentions, build_network_graphs
-from topic_modeling import lda_topic_modeling
+from burst_detection import show_burst_alerts
+from network_analysis import extract_top_hashtags_mentions, build_network_graphs, draw_network_graphs
+from topic_modeling import lda_topic_modeling, show_topic_results
 from cohere_summary import generate_insight_from_accuracy
+from pipeline import load_artifacts, ARTIFACTS_DIR, STATE_FILE
+from text_store import text_store_for
+from profiling import show_profiling_panel, profile_stage
 import google.generativeai as genai
 
 # File paths
@@ -23,6 +29,26 @@ MAP_IMAGE_PATH = "shapefile/disaster_post_distribution.png"
 # API
 cohere_api = "Your-API"
 
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _pipeline_outputs(stage, data_version, state_version):
+    """
+    Checks a stage's artifacts once per version of the preprocessed data and of the
+    pipeline state, so reruns do not re-hash the data on every interaction.
+    """
+    return load_artifacts(stage, config={"preprocessed_file": PREPROCESSED_DATA_FILE, "shapefile": SHAPEFILE_PATH})
+
+
+def load_pipeline_outputs(stage):
+    """
+    Returns the output files of the latest headless pipeline run of a stage, or None
+    if it has not run or was run on different data.
+    """
+    state_path = os.path.join(ARTIFACTS_DIR, STATE_FILE)
+    if not os.path.exists(state_path) or not os.path.exists(PREPROCESSED_DATA_FILE):
+        return None
+    return _pipeline_outputs(stage, file_version(PREPROCESSED_DATA_FILE), file_version(state_path))
+
 # ------------------------
 # Streamlit UI
 # ------------------------
@@ -69,12 +95,20 @@ elif menu == "Classification":
     st.title("🔍 Classification and AI Insight")
 
     if os.path.exists(PREPROCESSED_DATA_FILE):
+        # Show the result of the latest headless pipeline run, if it is up to date
+        pipeline_outputs = load_pipeline_outputs("classify")
+        if pipeline_outputs:
+            with open(pipeline_outputs["metrics"]) as f:
+                metrics = json.load(f)
+            st.subheader(f"🎯 Model Accuracy (latest pipeline run): {metrics['accuracy']:.2%}")
+            st.text(metrics["classification_report"])
+
         if st.button("Run Classification Report"):
-            df = pd.read_csv(PREPROCESSED_DATA_FILE)
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+            df = load_preprocessed_data(PREPROCESSED_DATA_FILE)
 
             st.write("🚀 Running Classification Report on the Full Dataset...")
-            model, vectorizer, accuracy, classification_rep, df = train_random_forest(df)
+            model, vectorizer, accuracy, classification_rep, df = train_random_forest(
+                df, text_store_for(df, PREPROCESSED_DATA_FILE))
 
             st.subheader(f"🎯 Model Accuracy: {accuracy:.2%}")
 
@@ -94,13 +128,17 @@ elif menu == "Analysis":
     st.title("📈 Disaster Psychological and Geospatial Analysis")
 
     if os.path.exists(PREPROCESSED_DATA_FILE):
-        df = pd.read_csv(PREPROCESSED_DATA_FILE)
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
-        df = df.dropna(subset=['Timestamp'])
+        df = load_preprocessed_data(PREPROCESSED_DATA_FILE, dropna_timestamps=True)
 
         # Time Series Analysis Section
         st.subheader("📅 Time Series Analysis")
-        run_time_series_analysis(PREPROCESSED_DATA_FILE)
+        run_time_series_analysis(df)
+
+        # Burst Detection Section
+        st.subheader("🚨 Flood Chatter Alerts")
+        burst_bucket = st.selectbox("Alert granularity", ["1D", "6h", "1h", "7D"],
+                                    format_func=lambda b: {"1D": "Daily", "6h": "6-hourly", "1h": "Hourly", "7D": "Weekly"}[b])
+        show_burst_alerts(df, bucket=burst_bucket, data_version=file_version(PREPROCESSED_DATA_FILE))
 
         # Analysis Option Section
         st.subheader("🧠 Psychological Analysis")
@@ -126,7 +164,21 @@ elif menu == "Analysis":
             start_date = pd.Timestamp(year=start_year, month=start_month, day=1)
             end_date = pd.Timestamp(year=end_year, month=end_month, day=28)
 
-            df_filtered = df[(df['Timestamp'] >= start_date) & (df['Timestamp'] <= end_date)]
+            # The cached frame is sorted by Timestamp, so the range is found by binary search
+            # (the partitioned store serves date-range queries outside the dashboard)
+            with profile_stage("load.date_range") as stage:
+                df_filtered = filter_date_range(df, start_date, end_date)
+                stage["rows"] = len(df_filtered)
+
+            # The headless pipeline analyses the whole dataset, so its results can be shown
+            # instead of recomputing whenever the selected range covers every month
+            last = df["Timestamp"].iloc[-1]
+            full_range = start_date <= df["Timestamp"].iloc[0] and (end_year, end_month) >= (last.year, last.month)
+            stage_name = {"Geospatial Analysis": "geospatial", "Sentiment Analysis": "sentiment",
+                          "Network Analysis": "network", "Topic Modeling": "topics"}[analysis_option]
+            outputs = load_pipeline_outputs(stage_name) if full_range else None
+            if outputs:
+                st.caption("📦 Showing results from the latest pipeline run.")
 
             if df_filtered.empty:
                 st.warning("⚠️ No data for the selected time range.")
@@ -134,17 +186,29 @@ elif menu == "Analysis":
                 if analysis_option == "Geospatial Analysis":
                     if os.path.exists(SHAPEFILE_PATH):
                         st.write("🗺️ Generating geospatial map...")
-                        plot_disaster_post_distribution(df_filtered, SHAPEFILE_PATH, save_path=MAP_IMAGE_PATH)
+                        if outputs:
+                            show_post_count_map(pd.read_csv(outputs["post_counts"]), SHAPEFILE_PATH, save_path=MAP_IMAGE_PATH)
+                        else:
+                            plot_disaster_post_distribution(df_filtered, SHAPEFILE_PATH, save_path=MAP_IMAGE_PATH)
                     else:
                         st.warning("⚠️ Shapefile not found.")
 
                 elif analysis_option == "Sentiment Analysis":
-                    st.write("📊 Performing sentiment and emotion analysis...")
-                    plot_sentiment_analysis(df_filtered)
+                    if outputs:
+                        show_sentiment_results(pd.read_csv(outputs["sentiment_counts"], index_col=0).iloc[:, 0],
+                                               pd.read_csv(outputs["emotion_counts"], index_col=0).iloc[:, 0],
+                                               pd.read_csv(outputs["emotion_trends"], index_col=0))
+                    else:
+                        st.write("📊 Performing sentiment and emotion analysis...")
+                        plot_sentiment_analysis(df_filtered)
 
                 elif analysis_option == "Network Analysis":
                     st.subheader("🔥 Hashtag and Mention Networks")
-                    hashtag_df, mention_df = extract_top_hashtags_mentions(df_filtered)
+                    if outputs:
+                        hashtag_df = pd.read_csv(outputs["top_hashtags"])
+                        mention_df = pd.read_csv(outputs["top_mentions"])
+                    else:
+                        hashtag_df, mention_df = extract_top_hashtags_mentions(df_filtered)
 
                     col1, col2 = st.columns(2)
                     with col1:
@@ -155,11 +219,22 @@ elif menu == "Analysis":
                         st.dataframe(mention_df)
 
                     st.subheader("🔗 Visualizing Networks")
-                    build_network_graphs(df_filtered)
+                    if outputs:
+                        draw_network_graphs(
+                            list(pd.read_csv(outputs["mention_edges"]).itertuples(index=False, name=None)),
+                            list(pd.read_csv(outputs["hashtag_edges"]).itertuples(index=False, name=None)))
+                    else:
+                        build_network_graphs(df_filtered)
 
                 elif analysis_option == "Topic Modeling":
                     st.subheader("📝 Topic Modeling Results")
-                    topics_df, df_filtered, lda_model = lda_topic_modeling(df_filtered)
+                    if outputs:
+                        topics_df = pd.read_csv(outputs["topics"])
+                        df_filtered = pd.read_csv(outputs["assignments"])
+                        show_topic_results(df_filtered, pd.read_csv(outputs["trends"], index_col=0))
+                    else:
+                        topics_df, df_filtered, lda_model = lda_topic_modeling(
+                            df_filtered, text_store=text_store_for(df_filtered, PREPROCESSED_DATA_FILE))
 
                     st.write("📌 **Extracted Topics**")
                     st.dataframe(topics_df)
@@ -168,3 +243,6 @@ elif menu == "Analysis":
                     st.dataframe(df_filtered[["Cleaned_Text", "Topic", "Topic Meaning"]])
     else:
         st.warning("⚠️ No preprocessed data found. Please run Preprocessing first.")
+
+# Profiling panel (drawn last so it includes the stages run on this page)
+show_profiling_panel()
@@ -5,12 +5,17 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from imblearn.over_sampling import SMOTE
 import numpy as np
+from profiling import profiled, profile_stage, record_rows
 
-def train_random_forest(df):
+@profiled("classify")
+def train_random_forest(df, text_store=None):
     """
     Trains a Random Forest classifier on the given dataset with hyperparameter tuning.
     
     :param df: DataFrame containing 'cleaned_text' (features) and 'label' (target)
+    :param text_store: Optional TextStore of the preprocessed data; when given, features are
+                       TF-IDF weighted rows of its count matrix (looked up by 'Doc_Id')
+                       instead of re-vectorizing the text
     :return: Best trained model, vectorizer, accuracy, classification report, top 10 important features
     """
 
@@ -18,19 +23,25 @@ def train_random_forest(df):
         df = pd.read_csv(df)
     else:
         df = df
+    record_rows(len(df))
 
 
     if "Cleaned_Text" not in df.columns or "Label" not in df.columns:
         raise ValueError("DataFrame must contain 'Cleaned_Text' and 'Label' columns.")
 
     # Extract features using TF-IDF vectorization
-    vectorizer = TfidfVectorizer(max_features=5000, stop_words="english")
-    X = vectorizer.fit_transform(df["Cleaned_Text"])
+    with profile_stage("classify.vectorize", rows=len(df)):
+        if text_store is not None:
+            vectorizer, X = text_store.tfidf_features(df["Doc_Id"], max_features=5000)
+        else:
+            vectorizer = TfidfVectorizer(max_features=5000, stop_words="english")
+            X = vectorizer.fit_transform(df["Cleaned_Text"])
     y = df["Label"]
 
     # Handle class imbalance using SMOTE
-    smote = SMOTE(random_state=42)
-    X_resampled, y_resampled = smote.fit_resample(X, y)
+    with profile_stage("classify.smote", rows=X.shape[0]):
+        smote = SMOTE(random_state=42)
+        X_resampled, y_resampled = smote.fit_resample(X, y)
 
     # Split data into training and testing sets
     X_train, X_test, y_train, y_test = train_test_split(X_resampled, y_resampled, test_size=0.2, random_state=42)
@@ -47,13 +58,15 @@ def train_random_forest(df):
     # Use RandomizedSearchCV for hyperparameter tuning
     clf = RandomForestClassifier(random_state=42)
     random_search = RandomizedSearchCV(clf, param_distributions=param_grid, n_iter=10, cv=3, verbose=2, n_jobs=-1)
-    random_search.fit(X_train, y_train)
+    with profile_stage("classify.search", rows=X_train.shape[0]):
+        random_search.fit(X_train, y_train)
 
     # Best model after tuning
     best_clf = random_search.best_estimator_
 
     # Predict on the test set
-    y_pred = best_clf.predict(X_test)
+    with profile_stage("classify.predict", rows=X_test.shape[0]):
+        y_pred = best_clf.predict(X_test)
 
     # Evaluate the model
     accuracy = accuracy_score(y_test, y_pred)
@@ -3,7 +3,9 @@ import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 import streamlit as st
+from profiling import profiled, profile_stage
 
+@profiled("network.top")
 def extract_top_hashtags_mentions(df, hashtag_column='Hashtag', mention_column='Mention', top_n=10):
     """
     Extracts and counts the most used hashtags and most mentioned users from a DataFrame.
@@ -33,9 +35,10 @@ def extract_top_hashtags_mentions(df, hashtag_column='Hashtag', mention_column='
 
     return hashtag_df, mention_df
 
-def build_network_graphs(df, hashtag_column='Hashtag', mention_column='Mention', text_column='Text', top_n=5):
+@profiled("network.edges")
+def build_network_edges(df, hashtag_column='Hashtag', mention_column='Mention', text_column='Text', top_n=5):
     """
-    Builds mention and hashtag co-occurrence networks from a DataFrame and displays in Streamlit.
+    Builds the edge lists of the mention and hashtag co-occurrence networks.
     
     Parameters:
         df (pd.DataFrame): The input DataFrame containing social media data.
@@ -45,7 +48,7 @@ def build_network_graphs(df, hashtag_column='Hashtag', mention_column='Mention',
         top_n (int): Number of top hashtags and mentions to consider in the networks.
     
     Returns:
-        None (Displays the generated network graphs in Streamlit).
+        tuple: Two lists of edges (post -> mention, hashtag <-> hashtag).
     """
     df[hashtag_column] = df[hashtag_column].fillna("")
     df[mention_column] = df[mention_column].fillna("")
@@ -59,14 +62,47 @@ def build_network_graphs(df, hashtag_column='Hashtag', mention_column='Mention',
     top_hashtags = [hashtag for hashtag, _ in hashtag_counts]
     top_mentions = [mention for mention, _ in mention_counts]
     
+    mention_edges = [(row[text_column][:30], mention) for _, row in df.iterrows()
+                     for mention in row[mention_column].split() if mention in top_mentions]
+    hashtag_edges = [(h1, h2) for _, row in df.iterrows()
+                     for h1 in row[hashtag_column].split() for h2 in row[hashtag_column].split()
+                     if h1 != h2 and h1 in top_hashtags and h2 in top_hashtags]
+    
+    return mention_edges, hashtag_edges
+
+@profiled("network")
+def build_network_graphs(df, hashtag_column='Hashtag', mention_column='Mention', text_column='Text', top_n=5):
+    """
+    Builds mention and hashtag co-occurrence networks from a DataFrame and displays in Streamlit.
+    
+    Parameters:
+        df (pd.DataFrame): The input DataFrame containing social media data.
+        hashtag_column (str): The column name containing hashtags.
+        mention_column (str): The column name containing mentions.
+        text_column (str): The column containing tweet/text data.
+        top_n (int): Number of top hashtags and mentions to consider in the networks.
+    
+    Returns:
+        None (Displays the generated network graphs in Streamlit).
+    """
+    mention_edges, hashtag_edges = build_network_edges(df, hashtag_column, mention_column, text_column, top_n)
+    draw_network_graphs(mention_edges, hashtag_edges)
+
+def draw_network_graphs(mention_edges_filtered, hashtag_edges_filtered):
+    """
+    Draws the mention and hashtag co-occurrence networks in Streamlit.
+    
+    Parameters:
+        mention_edges_filtered (list): (post, mention) edges from `build_network_edges`.
+        hashtag_edges_filtered (list): (hashtag, hashtag) edges from `build_network_edges`.
+    """
     # Build mention network
     mention_graph_filtered = nx.DiGraph()
-    mention_edges_filtered = [(row[text_column][:30], mention) for _, row in df.iterrows()
-                              for mention in row[mention_column].split() if mention in top_mentions]
     mention_graph_filtered.add_edges_from(mention_edges_filtered)
     
     # Apply layout and draw mention network
-    mention_pos_filtered = nx.spring_layout(mention_graph_filtered, k=1.7)
+    with profile_stage("network.layout", rows=mention_graph_filtered.number_of_nodes()):
+        mention_pos_filtered = nx.spring_layout(mention_graph_filtered, k=1.7)
     fig, ax = plt.subplots(figsize=(14, 10))
     nx.draw(mention_graph_filtered, mention_pos_filtered, with_labels=True,
             node_size=300, font_size=9, edge_color="gray", alpha=0.6, node_color="skyblue", ax=ax)
@@ -75,13 +111,11 @@ def build_network_graphs(df, hashtag_column='Hashtag', mention_column='Mention',
     
     # Build hashtag co-occurrence network
     hashtag_graph_filtered = nx.Graph()
-    hashtag_edges_filtered = [(h1, h2) for _, row in df.iterrows()
-                              for h1 in row[hashtag_column].split() for h2 in row[hashtag_column].split()
-                              if h1 != h2 and h1 in top_hashtags and h2 in top_hashtags]
     hashtag_graph_filtered.add_edges_from(hashtag_edges_filtered)
     
     # Apply layout and draw hashtag network
-    hashtag_pos_filtered = nx.spring_layout(hashtag_graph_filtered, k=0.8)
+    with profile_stage("network.layout", rows=hashtag_graph_filtered.number_of_nodes()):
+        hashtag_pos_filtered = nx.spring_layout(hashtag_graph_filtered, k=0.8)
     fig, ax = plt.subplots(figsize=(14, 10))
     nx.draw(hashtag_graph_filtered, hashtag_pos_filtered, with_labels=True,
             node_size=300, font_size=9, edge_color="gray", alpha=0.6, node_color="lightcoral", ax=ax)
@@ -0,0 +1,232 @@
+import bisect
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from data_preprocessor import parse_timestamps
+
+INDEX_FILE = "_index.json"
+
+# Rows per Parquet row group. Row groups are the unit read from a partition that
+# only partly overlaps a query, so smaller groups mean less over-reading.
+ROW_GROUP_SIZE = 65_536
+
+
+def partition_dir_for(csv_path):
+    """
+    Returns the directory of the partitioned store that mirrors a preprocessed CSV file.
+    """
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path), f"{stem}_partitions")
+
+
+def _partition_path(root, month):
+    return os.path.join(root, f"{month}.parquet")
+
+
+def _read_index(root):
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_index(root, index):
+    path = os.path.join(root, INDEX_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(dict(sorted(index.items())), f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def _prepare(df, timestamp_column):
+    """
+    Parses timestamps and drops rows without one.
+    """
+    df = df.copy()
+    df[timestamp_column] = parse_timestamps(df[timestamp_column])
+    return df.dropna(subset=[timestamp_column])
+
+
+def _write_partition(root, month, part, timestamp_column):
+    part = part.sort_values(timestamp_column, kind="stable").reset_index(drop=True)
+    pq.write_table(pa.Table.from_pandas(part, preserve_index=False),
+                   _partition_path(root, month), row_group_size=ROW_GROUP_SIZE)
+    return {
+        "rows": len(part),
+        "min": part[timestamp_column].iloc[0].isoformat(),
+        "max": part[timestamp_column].iloc[-1].isoformat(),
+    }
+
+
+def append_partitions(df, root, timestamp_column="Timestamp"):
+    """
+    Adds posts to the month-partitioned store.
+
+    Each partition holds one calendar month, sorted by timestamp. Only the months
+    touched by `df` are rewritten. Rows without a parseable timestamp are skipped.
+
+    :param df: Preprocessed posts to add.
+    :param root: Directory of the partitioned store.
+    :param timestamp_column: The column containing post timestamps.
+    """
+    df = _prepare(df, timestamp_column)
+    if df.empty:
+        return
+
+    os.makedirs(root, exist_ok=True)
+    index = _read_index(root)
+
+    for period, part in df.groupby(df[timestamp_column].dt.to_period("M")):
+        month = str(period)
+        if month in index:
+            existing = pq.read_table(_partition_path(root, month)).to_pandas()
+            part = pd.concat([existing, part], ignore_index=True)
+        index[month] = _write_partition(root, month, part, timestamp_column)
+
+    _write_index(root, index)
+
+
+def clear_partitions(root):
+    """
+    Removes the partitions and index of a partitioned store.
+    """
+    if os.path.exists(root):
+        for name in os.listdir(root):
+            if name.endswith(".parquet") or name == INDEX_FILE:
+                os.remove(os.path.join(root, name))
+
+
+def build_partitions_from_csv(csv_path, root, timestamp_column="Timestamp"):
+    """
+    Rebuilds the partitioned store from the preprocessed CSV file.
+    """
+    clear_partitions(root)
+    append_partitions(pd.read_csv(csv_path), root, timestamp_column)
+
+
+def partitions_up_to_date(root, csv_path):
+    """
+    Returns True if the partitioned store exists and is at least as new as the CSV file.
+    """
+    index_path = os.path.join(root, INDEX_FILE)
+    return os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(csv_path)
+
+
+def _read_partition_range(path, start, end, timestamp_column):
+    """
+    Reads the rows of one partition between `start` and `end` (inclusive).
+
+    Row groups are located by binary search over their timestamp statistics so only
+    overlapping groups are read; the exact rows are then found by binary search over
+    the sorted timestamps.
+    """
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    column = parquet_file.schema_arrow.get_field_index(timestamp_column)
+
+    group_min = []
+    group_max = []
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(column).statistics
+        group_min.append(pd.Timestamp(statistics.min))
+        group_max.append(pd.Timestamp(statistics.max))
+
+    first = bisect.bisect_left(group_max, start)
+    last = bisect.bisect_right(group_min, end)
+    if first >= last:
+        return None
+
+    part = parquet_file.read_row_groups(range(first, last)).to_pandas()
+    timestamps = part[timestamp_column].to_numpy()
+    lo = np.searchsorted(timestamps, start.to_datetime64(), side="left")
+    hi = np.searchsorted(timestamps, end.to_datetime64(), side="right")
+    return part.iloc[lo:hi]
+
+
+def query_date_range(root, start, end, timestamp_column="Timestamp"):
+    """
+    Returns the posts with timestamps between `start` and `end` (inclusive).
+
+    Months are located by binary search over the partition index, months entirely
+    inside the range are read whole and the two boundary months are trimmed with
+    `_read_partition_range`, so the cost grows with the size of the selected window
+    rather than the whole history.
+
+    :param root: Directory of the partitioned store.
+    :param start: Start of the range.
+    :param end: End of the range.
+    :param timestamp_column: The column containing post timestamps.
+    :return: DataFrame of posts in the range, sorted by timestamp.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    index = _read_index(root)
+    months = sorted(index)
+
+    lo = bisect.bisect_left(months, str(start.to_period("M")))
+    hi = bisect.bisect_right(months, str(end.to_period("M")))
+
+    parts = []
+    for month in months[lo:hi]:
+        path = _partition_path(root, month)
+        entry = index[month]
+        if pd.Timestamp(entry["min"]) >= start and pd.Timestamp(entry["max"]) <= end:
+            part = pq.read_table(path).to_pandas()
+        else:
+            part = _read_partition_range(path, start, end, timestamp_column)
+        if part is not None and not part.empty:
+            parts.append(part)
+
+    if not parts:
+        return pd.DataFrame(columns=pq.read_schema(_partition_path(root, months[0])).names if months else [])
+
+    df = pd.concat(parts, ignore_index=True)
+    if "Location" in df.columns:
+        df["Location"] = df["Location"].astype("category")
+    return df
+
+
+def benchmark_date_range_query(root, n_rows=10_000_000, years=10, seed=42):
+    """
+    Builds a synthetic partitioned store of `n_rows` posts spread over `years` years
+    and times date-range queries of increasing width against a full in-memory filter.
+
+    :return: DataFrame with the window, rows returned and query time in seconds.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2015-01-01")
+    seconds = rng.integers(0, years * 365 * 86400, n_rows)
+    df = pd.DataFrame({
+        "Text": "flood warning issued",
+        "Timestamp": start + pd.to_timedelta(np.sort(seconds), unit="s"),
+        "Label": rng.integers(0, 2, n_rows, dtype=np.int8),
+        "Location": pd.Categorical(rng.choice(["devon", "kent", "essex", "surrey", "cardiff"], n_rows)),
+    })
+    append_partitions(df, root)
+
+    results = []
+    for label, width in [("1 week", pd.Timedelta(days=7)), ("1 month", pd.DateOffset(months=1)),
+                         ("1 year", pd.DateOffset(years=1)), ("5 years", pd.DateOffset(years=5))]:
+        begin = start + pd.DateOffset(years=years // 2)
+        t0 = time.perf_counter()
+        rows = len(query_date_range(root, begin, begin + width))
+        results.append({"Window": label, "Rows": rows, "Seconds": time.perf_counter() - t0})
+
+    t0 = time.perf_counter()
+    loaded = pd.concat([pq.read_table(_partition_path(root, m)).to_pandas() for m in sorted(_read_index(root))])
+    begin = start + pd.DateOffset(years=years // 2)
+    rows = int(((loaded["Timestamp"] >= begin) & (loaded["Timestamp"] <= begin + pd.DateOffset(months=1))).sum())
+    results.append({"Window": "1 month (full load + mask)", "Rows": rows, "Seconds": time.perf_counter() - t0})
+
+    return pd.DataFrame(results)
+
+
+# Run standalone for benchmarking
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(benchmark_date_range_query(tmp))
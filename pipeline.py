@@ -0,0 +1,431 @@
+"""
+Headless pipeline runner: scrape -> preprocess -> classification and analyses.
+
+Each stage declares the stages it depends on, the source files it runs and any extra
+input files. A stage's key is a content hash of all of these plus the output hashes
+of its dependencies; when the key matches the last successful run and the outputs
+are still on disk the stage is skipped. Stages whose dependencies are complete run
+together in worker processes. Outputs are written under the artifacts directory and
+recorded in `pipeline_state.json`, which the dashboard reads through `load_artifacts`.
+
+Runs limited to a date range (`--start`/`--end`) read only the months in range from
+the month-partitioned copy of the preprocessed data.
+
+Usage:
+    python pipeline.py [--scrape] [--force STAGE ...] [--only STAGE ...] [--workers N] [--profile FILE]
+                       [--start DATE] [--end DATE]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from profiling import configure
+
+# Default file paths (kept in line with main.py)
+SCRAPED_DATA_FILE = "Datasets/social_media_data.csv"
+PREPROCESSED_DATA_FILE = "Datasets/preprocessed_flood_data_test.csv"
+SHAPEFILE_PATH = "shapefile/CTYUA_MAY_2023_UK_BGC.shp"
+ARTIFACTS_DIR = "artifacts"
+STATE_FILE = "pipeline_state.json"
+
+# Stages that only run when requested explicitly, never as an implied dependency
+OPTIONAL_STAGES = {"scrape"}
+
+
+# ------------------------
+# Hashing helpers
+# ------------------------
+
+def hash_file(path, chunk_size=1 << 20):
+    """
+    Returns the SHA-256 of a file's contents, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_outputs(outputs):
+    """
+    Returns a combined hash of a stage's output files.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(outputs):
+        digest.update(name.encode())
+        digest.update(str(hash_file(outputs[name])).encode())
+    return digest.hexdigest()
+
+
+# ------------------------
+# Stage implementations
+# ------------------------
+# Each stage receives the output paths of its dependencies and its own output
+# directory, and returns a dict of the files it wrote.
+
+def _load(inputs, config):
+    from data_loader import load_date_range, load_preprocessed_data
+    if config.get("start") or config.get("end"):
+        return load_date_range(inputs["preprocess"]["data"], config.get("start"), config.get("end"))
+    return load_preprocessed_data(inputs["preprocess"]["data"])
+
+
+def _text_store(inputs, df):
+    from text_store import text_store_for
+    return text_store_for(df, inputs["preprocess"]["data"])
+
+
+def run_scrape(inputs, out_dir, config):
+    from scraper import scrape_flood_posts
+    scrape_flood_posts(["UnitedKingdom"], limit=config["scrape_limit"], output_file=config["scraped_file"])
+    return {"data": config["scraped_file"]}
+
+
+def run_preprocess(inputs, out_dir, config):
+    from data_preprocessor import preprocess_flood_data
+    from partitioned_store import partition_dir_for
+    from text_store import text_store_dir_for, MANIFEST_FILE
+
+    # preprocess_flood_data appends, so rebuild the derived files from scratch
+    output_file = config["preprocessed_file"]
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    shutil.rmtree(partition_dir_for(output_file), ignore_errors=True)
+    shutil.rmtree(text_store_dir_for(output_file), ignore_errors=True)
+
+    preprocess_flood_data(config["scraped_file"], output_file)
+    return {"data": output_file, "text_store": os.path.join(text_store_dir_for(output_file), MANIFEST_FILE)}
+
+
+def run_classify(inputs, out_dir, config):
+    import joblib
+    from model import train_random_forest
+
+    df = _load(inputs, config)
+    model, vectorizer, accuracy, classification_rep, _ = train_random_forest(df, _text_store(inputs, df))
+
+    metrics_path = os.path.join(out_dir, "metrics.json")
+    with open(metrics_path, "w") as f:
+        json.dump({"accuracy": accuracy, "classification_report": classification_rep}, f, indent=1)
+
+    model_path = os.path.join(out_dir, "model.joblib")
+    joblib.dump({"model": model, "vectorizer": vectorizer}, model_path)
+    return {"metrics": metrics_path, "model": model_path}
+
+
+def run_sentiment(inputs, out_dir, config):
+    from sentiment import analyze_sentiment
+
+    _, sentiment_counts, emotion_counts, emotion_trends = analyze_sentiment(_load(inputs, config))
+    outputs = {
+        "sentiment_counts": os.path.join(out_dir, "sentiment_counts.csv"),
+        "emotion_counts": os.path.join(out_dir, "emotion_counts.csv"),
+        "emotion_trends": os.path.join(out_dir, "emotion_trends.csv"),
+    }
+    sentiment_counts.to_csv(outputs["sentiment_counts"])
+    emotion_counts.to_csv(outputs["emotion_counts"])
+    emotion_trends.to_csv(outputs["emotion_trends"])
+    return outputs
+
+
+def run_topics(inputs, out_dir, config):
+    from topic_modeling import fit_lda_topics, count_topic_trends
+
+    df = _load(inputs, config)
+    topics_df, df, _ = fit_lda_topics(df, text_store=_text_store(inputs, df))
+    outputs = {
+        "topics": os.path.join(out_dir, "topics.csv"),
+        "assignments": os.path.join(out_dir, "assignments.csv"),
+        "trends": os.path.join(out_dir, "trends.csv"),
+    }
+    topics_df.to_csv(outputs["topics"], index=False)
+    df[["Cleaned_Text", "Topic", "Topic Meaning"]].to_csv(outputs["assignments"], index=False)
+    count_topic_trends(df).to_csv(outputs["trends"])
+    return outputs
+
+
+def run_network(inputs, out_dir, config):
+    from network_analysis import extract_top_hashtags_mentions, build_network_edges
+
+    df = _load(inputs, config)
+    hashtag_df, mention_df = extract_top_hashtags_mentions(df)
+    mention_edges, hashtag_edges = build_network_edges(df)
+    outputs = {
+        "top_hashtags": os.path.join(out_dir, "top_hashtags.csv"),
+        "top_mentions": os.path.join(out_dir, "top_mentions.csv"),
+        "mention_edges": os.path.join(out_dir, "mention_edges.csv"),
+        "hashtag_edges": os.path.join(out_dir, "hashtag_edges.csv"),
+    }
+    hashtag_df.to_csv(outputs["top_hashtags"], index=False)
+    mention_df.to_csv(outputs["top_mentions"], index=False)
+    pd.DataFrame(mention_edges, columns=["Post", "Mention"]).to_csv(outputs["mention_edges"], index=False)
+    pd.DataFrame(hashtag_edges, columns=["Hashtag 1", "Hashtag 2"]).to_csv(outputs["hashtag_edges"], index=False)
+    return outputs
+
+
+def run_geospatial(inputs, out_dir, config):
+    from geo_spatial import load_boundary_layer, count_posts_by_location, JOIN_TOLERANCE
+
+    join_map = load_boundary_layer(config["shapefile"], JOIN_TOLERANCE)
+    location_counts = count_posts_by_location(_load(inputs, config), join_map)
+    outputs = {"post_counts": os.path.join(out_dir, "post_counts.csv")}
+    location_counts.to_csv(outputs["post_counts"], index=False)
+    return outputs
+
+
+def run_time_series(inputs, out_dir, config):
+    from time_series import process_timestamps, count_messages_over_time
+
+    df = process_timestamps(_load(inputs, config))
+    outputs = {
+        "yearly_counts": os.path.join(out_dir, "yearly_counts.csv"),
+        "monthly_counts": os.path.join(out_dir, "monthly_counts.csv"),
+    }
+    count_messages_over_time(df).rename("posts").to_csv(outputs["yearly_counts"])
+    df.groupby(df["Timestamp"].dt.to_period("M")).size().rename("posts").to_csv(outputs["monthly_counts"])
+    return outputs
+
+
+def run_bursts(inputs, out_dir, config):
+    from burst_detection import replay_history
+
+    events_df, _ = replay_history(_load(inputs, config))
+    outputs = {"events": os.path.join(out_dir, "events.csv")}
+    events_df.to_csv(outputs["events"], index=False)
+    return outputs
+
+
+# name: (function, dependencies, source files, config keys naming extra input files)
+STAGES = {
+    "scrape": (run_scrape, [], ["scraper.py"], []),
+    "preprocess": (run_preprocess, ["scrape"], ["data_preprocessor.py", "partitioned_store.py", "text_store.py"], ["scraped_file"]),
+    "classify": (run_classify, ["preprocess"], ["model.py", "data_loader.py", "text_store.py"], []),
+    "sentiment": (run_sentiment, ["preprocess"], ["sentiment.py", "data_loader.py"], []),
+    "topics": (run_topics, ["preprocess"], ["topic_modeling.py", "data_loader.py", "text_store.py"], []),
+    "network": (run_network, ["preprocess"], ["network_analysis.py", "data_loader.py"], []),
+    "geospatial": (run_geospatial, ["preprocess"], ["geo_spatial.py", "data_loader.py"], ["shapefile"]),
+    "time_series": (run_time_series, ["preprocess"], ["time_series.py", "data_loader.py"], []),
+    "bursts": (run_bursts, ["preprocess"], ["burst_detection.py", "data_loader.py"], []),
+}
+
+
+# ------------------------
+# Runner
+# ------------------------
+
+def _stage_dir(artifacts_dir, name):
+    return os.path.join(artifacts_dir, name)
+
+
+def _read_state(artifacts_dir):
+    path = os.path.join(artifacts_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_state(artifacts_dir, state):
+    path = os.path.join(artifacts_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def stage_key(name, state, config):
+    """
+    Returns the content hash of everything a stage reads: its source files, its extra
+    input files, the recorded output hashes of its dependencies and, for runs limited to
+    a date range, the range.
+    """
+    _, deps, sources, input_keys = STAGES[name]
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    digest = hashlib.sha256(name.encode())
+    for source in sources:
+        digest.update(str(hash_file(os.path.join(here, source))).encode())
+    for key in input_keys:
+        digest.update(str(hash_file(config[key])).encode())
+    for dep in deps:
+        digest.update(str(state.get(dep, {}).get("output_hash")).encode())
+
+    window = [config.get("start"), config.get("end")]
+    if "preprocess" in deps and any(window):
+        # Windowed runs read the month partitions rather than the whole CSV
+        digest.update(json.dumps(window).encode())
+        digest.update(str(hash_file(os.path.join(here, "partitioned_store.py"))).encode())
+    return digest.hexdigest()
+
+
+def _is_current(name, key, state):
+    """
+    Returns True if a stage's inputs are unchanged and its outputs are still on disk as
+    it wrote them. Outputs modified since (e.g. the dashboard appending to the
+    preprocessed CSV) make the stage stale, and through its output hash its dependants.
+    """
+    record = state.get(name)
+    if record is None or record["key"] != key:
+        return False
+    if not all(os.path.exists(path) for path in record["outputs"].values()):
+        return False
+    return hash_outputs(record["outputs"]) == record["output_hash"]
+
+
+def _run_stage(name, inputs, out_dir, config):
+    """
+    Runs one stage (in a worker process) and returns its outputs and timing.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    outputs = STAGES[name][0](inputs, out_dir, config)
+    return outputs, time.perf_counter() - start
+
+
+def _build_config(overrides=None):
+    return {
+        "scraped_file": SCRAPED_DATA_FILE,
+        "preprocessed_file": PREPROCESSED_DATA_FILE,
+        "shapefile": SHAPEFILE_PATH,
+        "scrape_limit": 100,
+        "start": None,
+        "end": None,
+        **(overrides or {}),
+    }
+
+
+def run_pipeline(stages=None, force=(), workers=None, artifacts_dir=ARTIFACTS_DIR, config=None):
+    """
+    Runs the pipeline, skipping stages whose inputs are unchanged.
+
+    :param stages: Stages to run (dependencies are added automatically). Defaults to
+                   every stage except 'scrape'.
+    :param force: Stages to re-run even if their inputs are unchanged.
+    :param workers: Number of worker processes for independent stages.
+    :param artifacts_dir: Directory for stage outputs and the pipeline state file.
+    :param config: Overrides for file paths and parameters.
+    :return: Dict of stage name -> 'skipped', 'ran' or 'failed'.
+    """
+    config = _build_config(config)
+
+    # Resolve the requested stages and their dependencies
+    selected = set()
+    pending = list(stages or [name for name in STAGES if name not in OPTIONAL_STAGES])
+    while pending:
+        name = pending.pop()
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage '{name}'. Choose from: {', '.join(STAGES)}")
+        if name not in selected:
+            selected.add(name)
+            pending.extend(dep for dep in STAGES[name][1] if dep not in OPTIONAL_STAGES)
+
+    os.makedirs(artifacts_dir, exist_ok=True)
+    state = _read_state(artifacts_dir)
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while len(results) < len(selected):
+            ready = [name for name in selected - set(results)
+                     if all(dep in results or dep not in selected for dep in STAGES[name][1])]
+
+            # Dependencies that failed block their dependants
+            blocked = [name for name in ready if any(results.get(dep) == "failed" for dep in STAGES[name][1])]
+            for name in blocked:
+                print(f"⚠️ {name}: skipped because a dependency failed.")
+                results[name] = "failed"
+            ready = [name for name in ready if name not in blocked]
+
+            futures = {}
+            for name in sorted(ready):
+                key = stage_key(name, state, config)
+                if name not in force and name not in OPTIONAL_STAGES and _is_current(name, key, state):
+                    print(f"⏭️ {name}: inputs unchanged, using cached artifacts.")
+                    results[name] = "skipped"
+                    continue
+
+                inputs = {dep: state[dep]["outputs"] for dep in STAGES[name][1] if dep in state}
+                out_dir = _stage_dir(artifacts_dir, name)
+                print(f"⏳ {name}: running...")
+                futures[name] = (key, executor.submit(_run_stage, name, inputs, out_dir, config))
+
+            for name, (key, future) in futures.items():
+                try:
+                    outputs, elapsed = future.result()
+                except Exception as e:
+                    print(f"❌ {name}: failed ({e}).")
+                    results[name] = "failed"
+                    continue
+
+                state[name] = {
+                    "key": key,
+                    "outputs": outputs,
+                    "output_hash": hash_outputs(outputs),
+                    "seconds": round(elapsed, 3),
+                    "completed_at": pd.Timestamp.now().isoformat(),
+                }
+                _write_state(artifacts_dir, state)
+                print(f"✅ {name}: completed in {elapsed:.1f}s.")
+                results[name] = "ran"
+
+    return results
+
+
+def load_artifacts(stage, artifacts_dir=ARTIFACTS_DIR, config=None):
+    """
+    Returns the output paths of a stage's last successful run, or None if the stage has
+    not run or is out of date (e.g. the preprocessed data changed since it ran).
+    """
+    config = _build_config(config)
+    state = _read_state(artifacts_dir)
+    preprocess = state.get("preprocess")
+    if preprocess is None or preprocess["output_hash"] != hash_outputs(preprocess["outputs"]):
+        return None
+    if os.path.abspath(preprocess["outputs"]["data"]) != os.path.abspath(config["preprocessed_file"]):
+        return None
+    if stage != "preprocess" and not _is_current(stage, stage_key(stage, state, config), state):
+        return None
+    return state[stage]["outputs"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the flood analysis pipeline without the dashboard.")
+    parser.add_argument("--scrape", action="store_true", help="Scrape new Reddit posts before preprocessing.")
+    parser.add_argument("--only", nargs="+", choices=list(STAGES), help="Run only these stages (and their dependencies).")
+    parser.add_argument("--force", nargs="+", default=[], choices=list(STAGES), help="Re-run these stages even if unchanged.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--artifacts", default=ARTIFACTS_DIR, help="Directory for pipeline artifacts.")
+    parser.add_argument("--input", default=SCRAPED_DATA_FILE, help="Raw scraped CSV file.")
+    parser.add_argument("--output", default=PREPROCESSED_DATA_FILE, help="Preprocessed CSV file.")
+    parser.add_argument("--shapefile", default=SHAPEFILE_PATH, help="CTYUA boundary shapefile.")
+    parser.add_argument("--profile", metavar="JSONL", help="Append per-stage profiling records to this file.")
+    parser.add_argument("--start", help="Only analyse posts from this date on (e.g. 2023-01-01).")
+    parser.add_argument("--end", help="Only analyse posts up to this date.")
+    args = parser.parse_args()
+
+    if args.profile:
+        # Worker processes read the export path from the environment when they import profiling
+        os.environ["PROFILE_EXPORT"] = args.profile
+        configure(export_path=args.profile)
+
+    stages = list(args.only) if args.only else [name for name in STAGES if name not in OPTIONAL_STAGES]
+    if args.scrape:
+        stages.append("scrape")
+
+    results = run_pipeline(stages, force=set(args.force), workers=args.workers, artifacts_dir=args.artifacts,
+                           config={"scraped_file": args.input, "preprocessed_file": args.output,
+                                   "shapefile": args.shapefile, "start": args.start, "end": args.end})
+
+    summary = ", ".join(f"{name}: {status}" for name, status in sorted(results.items()))
+    print(f"📋 {summary}")
+    raise SystemExit(1 if "failed" in results.values() else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Per-stage instrumentation for the scraping, preprocessing and analysis modules.
+
+Wrap a stage with the `profiled` decorator or the `profile_stage` context manager to
+record its wall time, rows processed, throughput and peak memory. Stages can be
+nested (e.g. "classify" > "classify.search"); each record notes its parent. Records
+are kept in memory for the dashboard's sidebar panel and can be exported as JSON
+lines for monitoring.
+
+Peak memory:
+    By default the growth of the process's peak resident size during the stage is
+    recorded. This is free, but only shows memory above the earlier high-water mark.
+    With memory tracing enabled (`configure(trace_memory=True)` or PROFILE_MEMORY=1)
+    the exact peak of Python allocations is measured with tracemalloc, which can slow
+    allocation-heavy stages several times over.
+
+cProfile:
+    With `configure(cprofile=True)` (or PROFILE_CPROFILE=1) the outermost running stage
+    is also run under cProfile and the top functions by cumulative time are kept on
+    its record.
+
+Usage:
+    @profiled("classify")
+    def train_random_forest(df): ...
+
+    with profile_stage("preprocess.read_csv"):
+        data = pd.read_csv(input_file)
+        record_rows(len(data))
+"""
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+# Number of stage records kept in memory for the dashboard
+MAX_RECORDS = 500
+
+# Number of functions kept from a cProfile capture
+PROFILE_TOP_N = 25
+
+_settings = {
+    "trace_memory": os.environ.get("PROFILE_MEMORY", "") == "1",
+    "cprofile": os.environ.get("PROFILE_CPROFILE", "") == "1",
+    "export_path": os.environ.get("PROFILE_EXPORT") or None,
+}
+
+_records = deque(maxlen=MAX_RECORDS)
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(trace_memory=None, cprofile=None, export_path=None):
+    """
+    Changes the profiling settings. Arguments left as None are unchanged.
+
+    :param trace_memory: Measure peak memory with tracemalloc instead of the resident size.
+    :param cprofile: Capture a cProfile of the outermost running stage.
+    :param export_path: JSON lines file each record is appended to as it completes
+                        ("" turns exporting off).
+    """
+    if trace_memory is not None:
+        _settings["trace_memory"] = trace_memory
+        if not trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    if cprofile is not None:
+        _settings["cprofile"] = cprofile
+    if export_path is not None:
+        _settings["export_path"] = export_path or None
+
+
+def settings():
+    """
+    Returns a copy of the current profiling settings.
+    """
+    return dict(_settings)
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def max_rss_bytes():
+    """
+    Returns the peak resident set size of this process in bytes, or None where it is
+    not available (Windows).
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # kilobytes on Linux
+
+
+def record_rows(n_rows):
+    """
+    Sets the number of rows processed by the innermost running stage.
+    """
+    stack = _stack()
+    if stack:
+        stack[-1]["record"]["rows"] = int(n_rows)
+
+
+def _start_profiler():
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is already active
+        return None
+    return profiler
+
+
+def _profile_summary(profiler):
+    profiler.disable()
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+    return buffer.getvalue()
+
+
+@contextlib.contextmanager
+def profile_stage(stage, rows=None):
+    """
+    Records the wall time, rows, throughput and peak memory of the enclosed block.
+
+    :param stage: Stage name; sub-stages use dotted names such as "classify.search".
+    :param rows: Number of rows processed, if known up front (see `record_rows`).
+    :return: Context manager yielding the stage's record (a dict).
+    """
+    stack = _stack()
+    record = {
+        "stage": stage,
+        "parent": stack[-1]["record"]["stage"] if stack else None,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": None,
+        "rows": rows,
+        "rows_per_sec": None,
+        "peak_bytes": None,
+        "memory_source": None,
+        "status": "ok",
+    }
+
+    trace_memory = _settings["trace_memory"]
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # Carry the parent's peak so far, then measure this stage from a fresh peak
+        current, peak = tracemalloc.get_traced_memory()
+        if stack and stack[-1]["trace_start"] is not None:
+            stack[-1]["trace_peak"] = max(stack[-1]["trace_peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"record": record, "trace_start": current, "trace_peak": current}
+    else:
+        frame = {"record": record, "trace_start": None, "rss_start": max_rss_bytes()}
+
+    profiler = _start_profiler() if _settings["cprofile"] and not stack else None
+
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = f"error: {type(e).__name__}"
+        raise
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        stack.pop()
+
+        if frame["trace_start"] is not None and tracemalloc.is_tracing():
+            peak = max(frame["trace_peak"], tracemalloc.get_traced_memory()[1])
+            record["peak_bytes"] = peak - frame["trace_start"]
+            record["memory_source"] = "tracemalloc"
+            if stack and stack[-1]["trace_start"] is not None:
+                stack[-1]["trace_peak"] = max(stack[-1]["trace_peak"], peak)
+        elif frame.get("rss_start") is not None:
+            record["peak_bytes"] = max_rss_bytes() - frame["rss_start"]
+            record["memory_source"] = "max_rss_growth"
+
+        if profiler is not None:
+            record["profile"] = _profile_summary(profiler)
+        if record["rows"] and record["seconds"] > 0:
+            record["rows_per_sec"] = record["rows"] / record["seconds"]
+
+        _store(record)
+
+
+def _count_rows(args):
+    """
+    Returns the length of the first DataFrame-, array- or list-like argument.
+    """
+    for arg in args:
+        if hasattr(arg, "shape") and getattr(arg, "ndim", 0) >= 1:
+            return arg.shape[0]
+        if isinstance(arg, (list, tuple)):
+            return len(arg)
+    return None
+
+
+def profiled(stage):
+    """
+    Decorator that runs a function inside `profile_stage(stage)`. The rows processed
+    default to the length of the first DataFrame, array or list argument.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_stage(stage, rows=_count_rows(args)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _store(record):
+    with _lock:
+        _records.append(record)
+        export_path = _settings["export_path"]
+        if export_path:
+            _append_jsonl(export_path, [record])
+
+
+def _append_jsonl(path, records):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def get_records(stage=None):
+    """
+    Returns the recorded stages, oldest first, optionally only those named `stage`
+    or its sub-stages.
+    """
+    with _lock:
+        records = list(_records)
+    if stage is not None:
+        records = [r for r in records if r["stage"] == stage or r["stage"].startswith(stage + ".")]
+    return records
+
+
+def clear_records():
+    """
+    Forgets all recorded stages.
+    """
+    with _lock:
+        _records.clear()
+
+
+def export_jsonl(path, records=None):
+    """
+    Appends stage records (all recorded stages by default) to a JSON lines file.
+
+    :return: Number of records written.
+    """
+    records = get_records() if records is None else records
+    with _lock:
+        _append_jsonl(path, records)
+    return len(records)
+
+
+def show_profiling_panel(export_path="artifacts/profiling.jsonl"):
+    """
+    Shows the profiling settings and the latest stage metrics in the Streamlit sidebar.
+    """
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Profiling"):
+        configure(
+            trace_memory=st.checkbox("Trace peak memory (slower)", value=_settings["trace_memory"]),
+            cprofile=st.checkbox("Capture cProfile", value=_settings["cprofile"]),
+        )
+
+        records = get_records()
+        if not records:
+            st.caption("No stages recorded yet. Run a page's analysis to collect metrics.")
+            return
+
+        table = pd.DataFrame(records[::-1])
+        table["peak_mib"] = table["peak_bytes"] / 2 ** 20
+        st.dataframe(table[["stage", "seconds", "rows", "rows_per_sec", "peak_mib", "status"]],
+                     hide_index=True, column_config={
+                         "seconds": st.column_config.NumberColumn(format="%.2f"),
+                         "rows_per_sec": st.column_config.NumberColumn("rows/s", format="%.0f"),
+                         "peak_mib": st.column_config.NumberColumn("peak MiB", format="%.1f"),
+                     })
+
+        profiles = [r for r in records if r.get("profile")]
+        if profiles:
+            latest = profiles[-1]
+            st.caption(f"cProfile of '{latest['stage']}' ({latest['started_at']})")
+            st.code(latest["profile"], language=None)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Export"):
+                st.success(f"✅ {export_jsonl(export_path)} records appended to {export_path}")
+        with col2:
+            if st.button("Clear"):
+                clear_records()
+                st.rerun()
+        st.download_button("Download JSONL", "".join(json.dumps(r) + "\n" for r in records),
+                           file_name="profiling.jsonl", mime="application/json")
@@ -3,6 +3,7 @@ import pandas as pd
 import os
 import spacy
 from datetime import datetime
+from profiling import profiled, record_rows
 
 # 🔑 Reddit API Credentials
 REDDIT_CLIENT_ID = "your_client_id"
@@ -32,6 +33,7 @@ def extract_location(text):
     locations = [ent.text for ent in doc.ents if ent.label_ == "GPE"]
     return locations[0].lower() if locations else None  # Return first detected location (lowercase)
 
+@profiled("scrape")
 def scrape_flood_posts(locations=["UnitedKingdom"], limit=100, output_file="Datasets/flood_reddit_posts.csv"):
     """
     Scrape flood-related Reddit posts and save them to a CSV file with lowercase column names.
@@ -63,6 +65,7 @@ def scrape_flood_posts(locations=["UnitedKingdom"], limit=100, output_file="Data
             print(f"⚠️ Could not fetch data from r/{location}: {e}")
 
     posts_df = pd.DataFrame(posts_data)
+    record_rows(len(posts_df))
 
     if posts_df.empty:
         print("⚠️ No posts found.")
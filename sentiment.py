@@ -1,11 +1,12 @@
 import matplotlib.pyplot as plt
-import pandas as pd
 import streamlit as st
 from textblob import TextBlob
 from collections import Counter
 import nltk
 from nltk.corpus import stopwords
 from transformers import pipeline
+from data_preprocessor import parse_timestamps
+from profiling import profiled, profile_stage
 
 # Force transformers to use PyTorch instead of TensorFlow
 emotion_classifier = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base", framework="pt", top_k=1)
@@ -33,16 +34,42 @@ def detect_emotion(text):
         result = "Unknown"
     return result
 
-def plot_sentiment_analysis(df):
+@profiled("sentiment")
+def analyze_sentiment(df):
     """
-    Analyze and plot sentiment and emotion distribution of social media posts.
+    Classify the sentiment and emotion of each post and aggregate the results.
+
+    :return: Updated DataFrame, sentiment counts, emotion counts and monthly emotion trends.
     """
-    df['sentiment'] = df['Cleaned_Text'].apply(get_sentiment)
+    with profile_stage("sentiment.textblob", rows=len(df)):
+        df['sentiment'] = df['Cleaned_Text'].apply(get_sentiment)
     sentiment_counts = df['sentiment'].value_counts()
     
-    df['emotion'] = df['Cleaned_Text'].apply(detect_emotion)
+    with profile_stage("sentiment.emotion", rows=len(df)):
+        df['emotion'] = df['Cleaned_Text'].apply(detect_emotion)
     emotion_counts = df['emotion'].value_counts()
+
+    # Convert timestamp to datetime format (no-op if already parsed by the data loader)
+    df['Timestamp'] = parse_timestamps(df['Timestamp'])
     
+    # Aggregate emotion counts over time (monthly)
+    df['month'] = df['Timestamp'].dt.to_period("M")
+    emotion_trends = df.groupby(['month', 'emotion']).size().unstack().fillna(0)
+
+    return df, sentiment_counts, emotion_counts, emotion_trends
+
+def plot_sentiment_analysis(df):
+    """
+    Analyze and plot sentiment and emotion distribution of social media posts.
+    """
+    df, sentiment_counts, emotion_counts, emotion_trends = analyze_sentiment(df)
+    show_sentiment_results(sentiment_counts, emotion_counts, emotion_trends)
+
+def show_sentiment_results(sentiment_counts, emotion_counts, emotion_trends):
+    """
+    Display sentiment and emotion counts and monthly emotion trends in Streamlit
+    (as returned by `analyze_sentiment` or saved by the pipeline).
+    """
     # Display sentiment and emotion counts in Streamlit
     st.subheader("📊 Sentiment Analysis of Social Media Posts")
     st.dataframe(sentiment_counts)
@@ -67,13 +94,6 @@ def plot_sentiment_analysis(df):
     ax.set_xticklabels(emotion_counts.index, rotation=45)
     st.pyplot(fig)
 
-    # Convert timestamp to datetime format
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
-    
-    # Aggregate emotion counts over time (monthly)
-    df['month'] = df['Timestamp'].dt.to_period("M")
-    emotion_trends = df.groupby(['month', 'emotion']).size().unstack().fillna(0)
-    
     # Plot psychological analysis trends over time
     fig, ax = plt.subplots(figsize=(12, 6))
     for emotion in emotion_trends.columns:
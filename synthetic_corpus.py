@@ -0,0 +1,218 @@
+"""
+Synthetic social media corpus generator for benchmarking.
+
+Generates raw posts with the same shape as `Datasets/social_media_data.csv`: post
+length, hashtag/mention/URL rates, Excel-serial timestamps (with a small share of
+scraped datetime strings), flood label balance and UK locations. When the real
+dataset is available its vocabulary and location mix are used; otherwise a built-in
+profile measured from it is used.
+"""
+import os
+import numpy as np
+import pandas as pd
+from data_preprocessor import parse_timestamps
+
+REAL_DATA_FILE = "Datasets/social_media_data.csv"
+
+# Measured from Datasets/social_media_data.csv
+DEFAULT_PROFILE = {
+    "words_mean": 19.1,
+    "words_std": 5.1,
+    "words_min": 5,
+    "words_max": 41,
+    "hashtag_rate": 0.219,      # share of posts with at least one hashtag
+    "hashtags_per_post": 0.372,
+    "mention_rate": 0.280,
+    "mentions_per_post": 0.353,
+    "url_rate": 0.273,
+    "flood_label_rate": 0.751,
+    "string_timestamp_rate": 0.036,
+    "serial_min": 41034.4,      # 2012-05-05
+    "serial_max": 45724.4,      # 2025-03-09
+    "vocabulary": ["flood", "water", "rain", "car", "road", "river", "heavy", "warning", "home", "people",
+                   "stuck", "rescue", "storm", "food", "just", "like", "got", "high", "town", "level",
+                   "bridge", "street", "help", "news", "alert", "weather", "damage", "house", "night", "today"],
+    "vocabulary_weights": None,
+    "hashtags": ["#flood", "#floods", "#rain", "#ukstorm", "#flooding", "#weather", "#storm", "#news"],
+    "mentions": ["@bbcnews", "@metoffice", "@envagency", "@skynews", "@itvnews", "@guardian"],
+    "locations": ["devon", "hampshire", "kent", "surrey", "essex", "lancashire", "nottinghamshire",
+                  "cardiff", "belfast", "cornwall", "norfolk", "cumbria"],
+    "location_weights": None,
+}
+
+
+def profile_from_csv(path=REAL_DATA_FILE, vocabulary_size=5000):
+    """
+    Measures a generation profile from a raw posts CSV.
+
+    :param path: Raw CSV with 'text', 'timestamp', 'label' and 'location' columns.
+    :param vocabulary_size: Number of most frequent words to keep.
+    :return: Profile dict in the same form as DEFAULT_PROFILE.
+    """
+    data = pd.read_csv(path).dropna()
+    text = data["text"].astype(str)
+    n_words = text.str.split().str.len()
+    serials = pd.to_numeric(data["timestamp"], errors="coerce")
+
+    words = text.str.replace(r"http\S+|www\S+|[@#]\w+", " ", regex=True).str.split().explode()
+    word_counts = words.value_counts().head(vocabulary_size)
+    hashtags = text.str.findall(r"#\w+").explode().dropna().str.lower().unique().tolist()
+    mentions = text.str.findall(r"@\w+").explode().dropna().str.lower().unique().tolist()
+    locations = data["location"].value_counts()
+
+    return {
+        "words_mean": float(n_words.mean()),
+        "words_std": float(n_words.std()),
+        "words_min": int(n_words.min()),
+        "words_max": int(n_words.max()),
+        "hashtag_rate": float(text.str.contains("#", regex=False).mean()),
+        "hashtags_per_post": float(text.str.count("#").mean()),
+        "mention_rate": float(text.str.contains("@", regex=False).mean()),
+        "mentions_per_post": float(text.str.count("@").mean()),
+        "url_rate": float(text.str.contains("http", regex=False).mean()),
+        "flood_label_rate": float((data["label"] == 1).mean()),
+        "string_timestamp_rate": float(serials.isna().mean()),
+        "serial_min": float(serials.min()),
+        "serial_max": float(serials.max()),
+        "vocabulary": word_counts.index.tolist(),
+        "vocabulary_weights": word_counts.to_numpy(dtype=np.float64).tolist(),
+        "hashtags": hashtags or DEFAULT_PROFILE["hashtags"],
+        "mentions": mentions or DEFAULT_PROFILE["mentions"],
+        "locations": locations.index.tolist(),
+        "location_weights": locations.to_numpy(dtype=np.float64).tolist(),
+    }
+
+
+def load_profile(path=REAL_DATA_FILE):
+    """
+    Returns the profile measured from the real dataset if present, else DEFAULT_PROFILE.
+    """
+    if os.path.exists(path):
+        return profile_from_csv(path)
+    return DEFAULT_PROFILE
+
+
+def _weights(weights):
+    if weights is None:
+        return None
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def _tags(rng, n_rows, rate, per_post, pool):
+    """
+    Draws a list of hashtags or mentions for each post, matching the share of posts
+    that have any and the mean number per post.
+    """
+    has = rng.random(n_rows) < rate
+    extra = max(per_post / rate - 1, 0) if rate else 0
+    counts = np.where(has, 1 + rng.poisson(extra, n_rows), 0)
+    picks = rng.choice(np.asarray(pool, dtype=object), counts.sum())
+    return np.split(picks, np.cumsum(counts)[:-1])
+
+
+def generate_corpus(n_rows, seed=42, profile=None):
+    """
+    Generates raw synthetic posts in the scraper's CSV format.
+
+    :param n_rows: Number of posts.
+    :param seed: Random seed.
+    :param profile: Generation profile (defaults to `load_profile()`).
+    :return: DataFrame with 'text', 'timestamp', 'label' and 'location' columns.
+    """
+    profile = profile or load_profile()
+    rng = np.random.default_rng(seed)
+
+    vocabulary = np.asarray(profile["vocabulary"], dtype=object)
+    n_words = np.clip(np.rint(rng.normal(profile["words_mean"], profile["words_std"], n_rows)),
+                      profile["words_min"], profile["words_max"]).astype(np.int64)
+    hashtags = _tags(rng, n_rows, profile["hashtag_rate"], profile["hashtags_per_post"], profile["hashtags"])
+    mentions = _tags(rng, n_rows, profile["mention_rate"], profile["mentions_per_post"], profile["mentions"])
+
+    # Hashtags and mentions count towards the post length
+    n_plain = np.maximum(n_words - np.fromiter(map(len, hashtags), np.int64, n_rows)
+                         - np.fromiter(map(len, mentions), np.int64, n_rows), 1)
+    words = rng.choice(vocabulary, n_plain.sum(), p=_weights(profile["vocabulary_weights"]))
+    words = np.split(words, np.cumsum(n_plain)[:-1])
+
+    has_url = rng.random(n_rows) < profile["url_rate"]
+    url_ids = rng.integers(0, 36 ** 8, n_rows)
+
+    texts = []
+    for i in range(n_rows):
+        parts = list(mentions[i]) + list(words[i]) + list(hashtags[i])
+        if has_url[i]:
+            parts.append(f"http://t.co/{np.base_repr(url_ids[i], 36).lower()}")
+        texts.append(" ".join(parts))
+
+    serials = rng.uniform(profile["serial_min"], profile["serial_max"], n_rows)
+    timestamps = pd.Series(np.round(serials, 10), dtype=object)
+    as_string = rng.random(n_rows) < profile["string_timestamp_rate"]
+    if as_string.any():
+        dates = pd.to_datetime(serials[as_string], unit="D", origin="1899-12-30").round("s")
+        timestamps[as_string] = dates.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+
+    locations = rng.choice(np.asarray(profile["locations"], dtype=object), n_rows,
+                           p=_weights(profile["location_weights"]))
+
+    return pd.DataFrame({
+        "text": texts,
+        "timestamp": timestamps,
+        "label": (rng.random(n_rows) < profile["flood_label_rate"]).astype(np.float64),
+        "location": locations,
+    })
+
+
+def write_corpus_csv(path, n_rows, seed=42, profile=None, chunk_size=500_000):
+    """
+    Writes a synthetic raw corpus to CSV in chunks, so 10M-row corpora can be generated
+    without holding them in memory.
+    """
+    profile = profile or load_profile()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    for i, start in enumerate(range(0, n_rows, chunk_size)):
+        chunk = generate_corpus(min(chunk_size, n_rows - start), seed + i, profile)
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+
+def to_preprocessed(raw):
+    """
+    Derives the preprocessed columns from a raw synthetic corpus with vectorised string
+    operations, giving analysis benchmarks realistic input without running the NLTK
+    lemmatiser. Timestamps are parsed, 'Location' is categorical and every post has a
+    'Doc_Id' (its row in a text store built from the corpus), as returned by the data
+    loader.
+    """
+    text = raw["text"].astype(str)
+    cleaned = (text.str.lower()
+               .str.replace(r"http\S+|www\S+|https\S+", "", regex=True)
+               .str.replace(r"@\w+|#\w+", "", regex=True)
+               .str.replace(r"[^\w\s]", "", regex=True)
+               .str.replace(r"\d+", "", regex=True)
+               .str.replace(r"\s+", " ", regex=True)
+               .str.strip())
+
+    def join_tags(pattern):
+        tags = text.str.findall(pattern).str.join(", ")
+        return tags.where(tags != "", None)
+
+    return pd.DataFrame({
+        "Text": text,
+        "Timestamp": parse_timestamps(raw["timestamp"]),
+        "Label": raw["label"].astype(np.int8),
+        "Location": raw["location"].astype("category"),
+        "Mention": join_tags(r"@\w+"),
+        "Hashtag": join_tags(r"#\w+"),
+        "Cleaned_Text": cleaned,
+        "Doc_Id": pd.to_numeric(np.arange(len(raw)), downcast="integer"),
+    })
+
+
+# Run standalone to write a corpus
+if __name__ == "__main__":
+    import sys
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    output = sys.argv[2] if len(sys.argv) > 2 else f"Datasets/synthetic_{rows}.csv"
+    write_corpus_csv(output, rows)
+    print(f"✅ Wrote {rows} synthetic posts to {output}")
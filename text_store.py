@@ -0,0 +1,328 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+MANIFEST_FILE = "manifest.json"
+VOCABULARY_FILE = "vocabulary.json"
+
+# Arrays of the store, saved as .npy files and memory-mapped when loaded:
+#   tokens_ids / tokens_indptr   - lemmatised tokens as term IDs, one CSR row per document
+#                                  (the CSV no longer keeps a 'Tokens' column)
+#   counts_*                     - document-term counts of 'Cleaned_Text' (CSR)
+ARRAYS = ["tokens_ids", "tokens_indptr", "counts_data", "counts_indices", "counts_indptr"]
+
+# Text analysis used for the count matrix; matches the vectorizers the classifier
+# and topic model used before (sklearn's default tokenizer and English stop words).
+STOP_WORDS = "english"
+
+_stores = {}
+
+
+def text_store_dir_for(csv_path):
+    """
+    Returns the directory of the text store that mirrors a preprocessed CSV file.
+    """
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path), f"{stem}_text")
+
+
+def _read_manifest(root):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_array(root, name, array):
+    path = os.path.join(root, f"{name}.npy")
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path + ".tmp", path)
+
+
+def _load_array(root, name, mmap_mode="r"):
+    return np.load(os.path.join(root, f"{name}.npy"), mmap_mode=mmap_mode)
+
+
+def text_store_size(root):
+    """
+    Returns the number of documents in the store, which is also the next 'Doc_Id'.
+    """
+    manifest = _read_manifest(root)
+    return manifest["n_docs"] if manifest else 0
+
+
+def text_store_up_to_date(root, csv_path):
+    """
+    Returns True if the text store exists and is at least as new as the CSV file.
+    """
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+    return os.path.exists(manifest_path) and os.path.getmtime(manifest_path) >= os.path.getmtime(csv_path)
+
+
+def csv_needs_text_store_rebuild(csv_path, root):
+    """
+    Returns True if the text store must be rebuilt from the CSV file before appending:
+    the store is missing or older than the CSV, or the CSV still has a 'Tokens' column
+    from before tokens moved into the store.
+    """
+    if not text_store_up_to_date(root, csv_path):
+        return True
+    return "Tokens" in pd.read_csv(csv_path, nrows=0).columns
+
+
+def clear_text_store(root):
+    """
+    Removes the files of a text store.
+    """
+    if os.path.exists(root):
+        for name in os.listdir(root):
+            if name.endswith(".npy") or name in (MANIFEST_FILE, VOCABULARY_FILE):
+                os.remove(os.path.join(root, name))
+
+
+def _term_ids(terms, vocabulary):
+    """
+    Maps terms to IDs, adding unseen terms to the end of the vocabulary.
+    """
+    terms = pd.Index(terms, dtype=object)
+    ids = pd.Index(vocabulary, dtype=object).get_indexer(terms)
+    new = pd.unique(terms[ids < 0])
+    if len(new):
+        vocabulary.extend(new)
+        ids = pd.Index(vocabulary, dtype=object).get_indexer(terms)
+    return ids.astype(np.int32)
+
+
+def append_documents(root, cleaned_texts, tokens):
+    """
+    Adds documents to the text store. Document i of the batch gets the 'Doc_Id'
+    `text_store_size(root) + i`, so callers assign IDs before appending.
+
+    Term IDs never change once assigned: new words are added to the end of the
+    vocabulary, and earlier rows of the count matrix simply have no entries for them.
+
+    :param root: Directory of the text store.
+    :param cleaned_texts: Iterable of cleaned post texts ('Cleaned_Text').
+    :param tokens: Iterable of lemmatised token lists.
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest = _read_manifest(root)
+    vocabulary = []
+    if manifest:
+        with open(os.path.join(root, VOCABULARY_FILE)) as f:
+            vocabulary = json.load(f)
+
+    # Count matrix: vectorise the batch, then map its columns onto the shared vocabulary
+    cleaned_texts = pd.Series(cleaned_texts).fillna("").astype(str)
+    vectorizer = CountVectorizer(stop_words=STOP_WORDS)
+    try:
+        batch_counts = vectorizer.fit_transform(cleaned_texts).tocsr()
+        column_ids = _term_ids(vectorizer.get_feature_names_out(), vocabulary)
+    except ValueError:  # no terms in the batch
+        batch_counts = sp.csr_matrix((len(cleaned_texts), 0), dtype=np.int64)
+        column_ids = np.empty(0, dtype=np.int32)
+    batch_counts = sp.csr_matrix((batch_counts.data, column_ids[batch_counts.indices], batch_counts.indptr),
+                                 shape=(batch_counts.shape[0], max(len(vocabulary), 1)))
+    batch_counts.sort_indices()
+
+    # Tokens: flatten the lists and map every word to its ID
+    tokens = [list(words) for words in tokens]
+    lengths = np.fromiter(map(len, tokens), np.int64, len(tokens))
+    token_ids = _term_ids([word for words in tokens for word in words], vocabulary)
+
+    if manifest:
+        old = {name: _load_array(root, name) for name in ARRAYS}
+        token_ids = np.concatenate([old["tokens_ids"], token_ids])
+        tokens_indptr = np.concatenate([old["tokens_indptr"], old["tokens_indptr"][-1] + np.cumsum(lengths)])
+        counts_data = np.concatenate([old["counts_data"], batch_counts.data])
+        counts_indices = np.concatenate([old["counts_indices"], batch_counts.indices])
+        counts_indptr = np.concatenate([old["counts_indptr"][:-1].astype(np.int64),
+                                        old["counts_indptr"][-1] + batch_counts.indptr.astype(np.int64)])
+        n_docs = manifest["n_docs"] + len(tokens)
+    else:
+        tokens_indptr = np.concatenate([[0], np.cumsum(lengths)])
+        counts_data, counts_indices, counts_indptr = batch_counts.data, batch_counts.indices, batch_counts.indptr
+        n_docs = len(tokens)
+
+    # scipy only keeps the memory-mapped arrays as they are if indices and indptr
+    # share a dtype, so use int32 for both unless the matrix is too large for it
+    index_dtype = np.int32 if len(counts_data) < 2 ** 31 else np.int64
+    arrays = {
+        "tokens_ids": token_ids.astype(np.int32),
+        "tokens_indptr": tokens_indptr.astype(np.int64),
+        "counts_data": counts_data.astype(np.int32),
+        "counts_indices": counts_indices.astype(index_dtype),
+        "counts_indptr": counts_indptr.astype(index_dtype),
+    }
+    for name, array in arrays.items():
+        _save_array(root, name, array)
+
+    with open(os.path.join(root, VOCABULARY_FILE), "w") as f:
+        json.dump(vocabulary, f)
+
+    # The manifest is written last, so a store is only complete once it exists
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump({"n_docs": n_docs, "n_terms": len(vocabulary), "n_tokens": len(arrays["tokens_ids"]),
+                   "nnz": len(arrays["counts_data"]), "stop_words": STOP_WORDS}, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def build_text_store_from_csv(csv_path, root):
+    """
+    Rebuilds the text store from the preprocessed CSV file.
+
+    Files written before the store existed have no 'Doc_Id' column and keep their tokens
+    in a 'Tokens' column; the IDs are added (in file order), the tokens are moved into
+    the store and the CSV is rewritten.
+
+    :return: True if the CSV file was rewritten.
+    """
+    df = pd.read_csv(csv_path)
+    doc_ids_valid = "Doc_Id" in df.columns and np.array_equal(df["Doc_Id"].to_numpy(), np.arange(len(df)))
+
+    if "Tokens" in df.columns:
+        # Tokens are stored in the CSV as the string form of a list, e.g. "['flood', 'road']"
+        tokens = df.pop("Tokens").fillna("").astype(str).str.findall(r"'([^']*)'").tolist()
+        rewritten = True
+    else:
+        # The CSV has no tokens of its own; keep the ones already in the store
+        store = load_text_store(root)
+        if doc_ids_valid and store is not None and store.n_docs >= len(df):
+            tokens = [store.tokens(doc_id) for doc_id in range(len(df))]
+        else:
+            tokens = [[]] * len(df)
+        rewritten = False
+
+    if not doc_ids_valid:
+        df["Doc_Id"] = np.arange(len(df))
+        rewritten = True
+    if rewritten:
+        df.to_csv(csv_path, index=False)
+
+    clear_text_store(root)
+    append_documents(root, df["Cleaned_Text"], tokens)
+    return rewritten
+
+
+class TextStore:
+    """
+    Memory-mapped view of a text store.
+
+    Attributes:
+        terms (np.ndarray): Vocabulary; a term's position is its ID.
+        counts (scipy.sparse.csr_matrix): Document-term counts, one row per 'Doc_Id'.
+        n_docs (int): Number of documents.
+    """
+
+    def __init__(self, root):
+        manifest = _read_manifest(root)
+        if manifest is None:
+            raise FileNotFoundError(f"No text store found in {root}")
+        with open(os.path.join(root, VOCABULARY_FILE)) as f:
+            self.terms = np.asarray(json.load(f), dtype=object)
+
+        self.n_docs = manifest["n_docs"]
+        self._token_ids = _load_array(root, "tokens_ids")
+        self._token_indptr = _load_array(root, "tokens_indptr")
+        self.counts = sp.csr_matrix((_load_array(root, "counts_data"), _load_array(root, "counts_indices"),
+                                     _load_array(root, "counts_indptr")),
+                                    shape=(self.n_docs, max(len(self.terms), 1)))
+
+    def token_ids(self, doc_id):
+        """
+        Returns the term IDs of a document's tokens.
+        """
+        return self._token_ids[self._token_indptr[doc_id]:self._token_indptr[doc_id + 1]]
+
+    def tokens(self, doc_id):
+        """
+        Returns a document's tokens as words.
+        """
+        return self.terms[self.token_ids(doc_id)].tolist()
+
+    def counts_for(self, doc_ids):
+        """
+        Returns the count matrix rows of the given documents, in the given order.
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) and (doc_ids.min() < 0 or doc_ids.max() >= self.n_docs):
+            raise ValueError("Doc_Id out of range for the text store; rebuild it from the preprocessed CSV.")
+        return self.counts[doc_ids]
+
+    def _select_terms(self, counts, max_features):
+        """
+        Returns the IDs of the `max_features` most frequent terms in `counts`, in
+        alphabetical order as a fitted vectorizer lists its features.
+
+        Ties are broken as in sklearn's `_limit_features`: the int64 frequencies of the
+        alphabetically ordered terms are ranked with the same `(-tfs).argsort()` call.
+        """
+        frequencies = np.asarray(counts.sum(axis=0, dtype=np.int64)).ravel()
+        present = np.flatnonzero(frequencies)
+        present = present[np.argsort(self.terms[present], kind="stable")]
+        if max_features is not None and len(present) > max_features:
+            keep = (-frequencies[present]).argsort()[:max_features]
+            present = present[np.sort(keep)]
+        return present
+
+    def count_features(self, doc_ids, max_features=None):
+        """
+        Equivalent of `CountVectorizer(stop_words="english", max_features=...)` fitted on
+        the given documents, without re-tokenising them.
+
+        :return: Tuple of (CountVectorizer with the selected vocabulary, count matrix).
+        """
+        counts = self.counts_for(doc_ids)
+        columns = self._select_terms(counts, max_features)
+        vectorizer = CountVectorizer(stop_words=STOP_WORDS, vocabulary=self.terms[columns].tolist())
+        return vectorizer, counts[:, columns]
+
+    def tfidf_features(self, doc_ids, max_features=None):
+        """
+        Equivalent of `TfidfVectorizer(stop_words="english", max_features=...)` fitted on
+        the given documents: TF-IDF weighting of the selected columns of the count matrix.
+
+        :return: Tuple of (fitted TfidfVectorizer, TF-IDF matrix).
+        """
+        vectorizer, counts = self.count_features(doc_ids, max_features)
+        transformer = TfidfTransformer()
+        X = transformer.fit_transform(counts)
+
+        # A vectorizer with the same vocabulary and IDF weights transforms new text the same way
+        tfidf_vectorizer = TfidfVectorizer(stop_words=STOP_WORDS, vocabulary=vectorizer.vocabulary)
+        tfidf_vectorizer.idf_ = transformer.idf_
+        return tfidf_vectorizer, X
+
+
+def load_text_store(root):
+    """
+    Returns the text store in `root`, or None if there is none. Stores are opened once
+    per process and reopened when the store changes.
+    """
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    key = (os.path.abspath(root), os.stat(manifest_path).st_mtime_ns)
+    if key not in _stores:
+        _stores[key] = TextStore(root)
+    return _stores[key]
+
+
+def text_store_for(df, csv_path, text_column="Cleaned_Text"):
+    """
+    Returns the text store of a preprocessed CSV file if it can be used for `df`: the
+    store is current, `df` has a 'Doc_Id' column and the text column is 'Cleaned_Text'.
+    Otherwise returns None and callers vectorise the text themselves.
+    """
+    if text_column != "Cleaned_Text" or "Doc_Id" not in df.columns or df["Doc_Id"].isna().any():
+        return None
+    root = text_store_dir_for(csv_path)
+    if not text_store_up_to_date(root, csv_path):
+        return None
+    return load_text_store(root)
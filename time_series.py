@@ -1,13 +1,15 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
 import os
+from data_preprocessor import parse_timestamps
+from data_loader import load_preprocessed_data
+from profiling import profiled, record_rows
 
 def process_timestamps(df):
     """
     Converts timestamp column to datetime format and extracts the year.
     """
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+    df['Timestamp'] = parse_timestamps(df['Timestamp'])
     df['year'] = df['Timestamp'].dt.to_period("Y")  # Convert to yearly period
     return df
 
@@ -60,17 +62,24 @@ def plot_monthly_time_series(df, selected_year):
     ax.grid(True)
     st.pyplot(fig)
 
-def run_time_series_analysis(preprocessed_file):
+@profiled("time_series")
+def run_time_series_analysis(data):
     """
-    Loads preprocessed data and runs time-series analysis before classification.
+    Runs time-series analysis before classification.
+
+    :param data: Preprocessed DataFrame, or the path to the preprocessed CSV file.
     """
-    if os.path.exists(preprocessed_file):
-        df = pd.read_csv(preprocessed_file)
-        plot_time_series(df)  # Ensures processing before plotting
-        available_years = sorted(df['Timestamp'].dropna().dt.year.astype(int).unique())
-        selected_year = st.selectbox("📅 Select a Year for Monthly Analysis", available_years)
+    if isinstance(data, str):
+        if not os.path.exists(data):
+            st.warning("⚠️ No preprocessed data found. Please run preprocessing first.")
+            return
+        data = load_preprocessed_data(data)
+
+    record_rows(len(data))
+    df = process_timestamps(data)
+    plot_time_series(df)  # Ensures processing before plotting
+    available_years = sorted(df['Timestamp'].dropna().dt.year.astype(int).unique())
+    selected_year = st.selectbox("📅 Select a Year for Monthly Analysis", available_years)
 
-        if st.button("Confirm Year Selection"):
-            plot_monthly_time_series(df, selected_year)
-    else:
-        st.warning("⚠️ No preprocessed data found. Please run preprocessing first.")
+    if st.button("Confirm Year Selection"):
+        plot_monthly_time_series(df, selected_year)
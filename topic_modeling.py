@@ -4,28 +4,46 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
+from data_preprocessor import parse_timestamps
+from profiling import profiled, profile_stage
 
-def lda_topic_modeling(df, text_column='Cleaned_Text', timestamp_column='Timestamp', n_topics=5, max_features=1000):
+# Topic meanings based on the words extracted for each topic
+TOPIC_MEANINGS = {
+    "Topic 1": "Disaster Relief & Needs",
+    "Topic 2": "Evacuation & Assistance",
+    "Topic 3": "Stranded People & Transport Issues",
+    "Topic 4": "Live Reporting & Rescue Efforts",
+    "Topic 5": "Personal Reactions to the Disaster"
+}
+
+@profiled("topics.fit")
+def fit_lda_topics(df, text_column='Cleaned_Text', n_topics=5, max_features=1000, text_store=None):
     """
-    Applies LDA topic modeling to extract key topics from text data and visualizes topic distribution and trends over time in Streamlit.
+    Fits an LDA topic model and assigns the dominant topic to each post.
     
     Parameters:
         df (pd.DataFrame): The input DataFrame containing text data.
         text_column (str): The column name containing cleaned text.
-        timestamp_column (str): The column containing timestamps for trend analysis.
         n_topics (int): Number of topics to extract.
         max_features (int): Maximum number of features for vectorization.
+        text_store (TextStore): Optional text store of the preprocessed data; when given, the
+            counts are read from its document-term matrix by 'Doc_Id' instead of re-vectorizing.
     
     Returns:
         tuple: A DataFrame of topic words, an updated DataFrame with topic assignments, and an LDA model.
     """
     # Vectorize text data
-    vectorizer = CountVectorizer(stop_words='english', max_features=max_features)
-    X = vectorizer.fit_transform(df[text_column].dropna())
+    with profile_stage("topics.fit.vectorize", rows=len(df)):
+        if text_store is not None:
+            vectorizer, X = text_store.count_features(df.dropna(subset=[text_column])["Doc_Id"], max_features)
+        else:
+            vectorizer = CountVectorizer(stop_words='english', max_features=max_features)
+            X = vectorizer.fit_transform(df[text_column].dropna())
     
     # Apply LDA for topic modeling
-    lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
-    lda.fit(X)
+    with profile_stage("topics.fit.lda", rows=X.shape[0]):
+        lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
+        lda.fit(X)
     
     # Get the top words for each topic
     words = vectorizer.get_feature_names_out()
@@ -37,23 +55,63 @@ def lda_topic_modeling(df, text_column='Cleaned_Text', timestamp_column='Timesta
     # Convert topics into a DataFrame
     topics_df = pd.DataFrame(topics)
     
-    # Define topic meanings based on extracted words
-    topic_meanings = {
-        "Topic 1": "Disaster Relief & Needs",
-        "Topic 2": "Evacuation & Assistance",
-        "Topic 3": "Stranded People & Transport Issues",
-        "Topic 4": "Live Reporting & Rescue Efforts",
-        "Topic 5": "Personal Reactions to the Disaster"
-    }
-    
     # Add topic meanings to the topics DataFrame
-    topics_df.loc[len(topics_df)] = topic_meanings.values()
+    topics_df.loc[len(topics_df)] = [TOPIC_MEANINGS.get(topic, "Unknown") for topic in topics_df.columns]
     
     # Assign topic labels to the main dataframe
     topic_assignments = lda.transform(X).argmax(axis=1)  # Get dominant topic for each text
     df = df.dropna(subset=[text_column]).reset_index(drop=True)  # Ensure index alignment
     df["Topic"] = topic_assignments + 1  # Convert zero-based index to human-friendly topic number
-    df["Topic Meaning"] = df["Topic"].map(lambda x: topic_meanings.get(f"Topic {x}", "Unknown"))
+    df["Topic Meaning"] = df["Topic"].map(lambda x: TOPIC_MEANINGS.get(f"Topic {x}", "Unknown"))
+    
+    return topics_df, df, lda
+
+@profiled("topics.trends")
+def count_topic_trends(df, timestamp_column='Timestamp'):
+    """
+    Counts posts per topic per month.
+    """
+    # Convert timestamp to datetime format if not already
+    df[timestamp_column] = parse_timestamps(df[timestamp_column])
+    
+    # Aggregate topic counts over time
+    df['month'] = df[timestamp_column].dt.to_period('M')
+    return df.groupby(['month', 'Topic']).size().unstack().fillna(0)
+
+@profiled("topics")
+def lda_topic_modeling(df, text_column='Cleaned_Text', timestamp_column='Timestamp', n_topics=5, max_features=1000,
+                       text_store=None):
+    """
+    Applies LDA topic modeling to extract key topics from text data and visualizes topic distribution and trends over time in Streamlit.
+    
+    Parameters:
+        df (pd.DataFrame): The input DataFrame containing text data.
+        text_column (str): The column name containing cleaned text.
+        timestamp_column (str): The column containing timestamps for trend analysis.
+        n_topics (int): Number of topics to extract.
+        max_features (int): Maximum number of features for vectorization.
+        text_store (TextStore): Optional text store to read document-term counts from.
+    
+    Returns:
+        tuple: A DataFrame of topic words, an updated DataFrame with topic assignments, and an LDA model.
+    """
+    topics_df, df, lda = fit_lda_topics(df, text_column, n_topics, max_features, text_store)
+    
+    # Aggregate topic counts over time
+    topic_trends = count_topic_trends(df, timestamp_column)
+    show_topic_results(df, topic_trends)
+    
+    return topics_df, df, lda
+
+def show_topic_results(df, topic_trends):
+    """
+    Displays the distribution of topics and topic trends over time in Streamlit.
+    
+    Parameters:
+        df (pd.DataFrame): Posts with a 'Topic' column (from `fit_lda_topics` or the pipeline's assignments).
+        topic_trends (pd.DataFrame): Monthly posts per topic (from `count_topic_trends`).
+    """
+    topic_meanings = TOPIC_MEANINGS
     
     # Display topic distribution in Streamlit
     topic_counts = df['Topic'].value_counts()
@@ -68,13 +126,6 @@ def lda_topic_modeling(df, text_column='Cleaned_Text', timestamp_column='Timesta
     plt.xticks(rotation=45, ha='right')
     st.pyplot(fig)
     
-    # Convert timestamp to datetime format if not already
-    df[timestamp_column] = pd.to_datetime(df[timestamp_column], errors='coerce')
-    
-    # Aggregate topic counts over time
-    df['month'] = df[timestamp_column].dt.to_period('M')
-    topic_trends = df.groupby(['month', 'Topic']).size().unstack().fillna(0)
-    
     # Display topic trends in Streamlit
     st.subheader("📈 Topic Trends Over Time")
     fig, ax = plt.subplots(figsize=(12, 6))
@@ -87,8 +138,6 @@ def lda_topic_modeling(df, text_column='Cleaned_Text', timestamp_column='Timesta
     plt.legend()
     plt.xticks(rotation=45)
     st.pyplot(fig)
-    
-    return topics_df, df, lda
 
 # Example usage:
 # topics_df, updated_df, lda_model = lda_topic_modeling(df)